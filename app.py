@@ -1,3 +1,4 @@
+import argparse
 import logging
 import re
 import base64
@@ -6,6 +7,8 @@ import streamlit as st
 
 from src.state import State
 from src.graph import build_graph
+from src.cache import response_cache, CACHE_MODES
+from config import CACHE_MODE, PROPERTY_TYPES
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,21 +16,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pass options after `--`, e.g. `streamlit run app.py -- --cache-mode=readonly`.
+parser = argparse.ArgumentParser()
+parser.add_argument("--cache-mode", choices=CACHE_MODES, default=CACHE_MODE)
+args, _ = parser.parse_known_args()
+response_cache.set_mode(args.cache_mode)
+
 st.title("Automated Property Submarket Analysis")
 
 with st.form("property_form"):
     address = st.text_input("Address *", placeholder="e.g. 5500 Grand Lake Dr, San Antonio, TX 78244")
     property_type = st.selectbox(
     "Property Type *",
-    options=[
-        "Single Family",
-        "Condo",
-        "Townhouse",
-        "Manufactured",
-        "Multi-Family",
-        "Apartment",
-        "Land"
-        ]
+    options=PROPERTY_TYPES
     )
     submitted = st.form_submit_button("Submit")
     
@@ -0,0 +1,153 @@
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+import numpy as np
+import pandas as pd
+
+from src.cache import response_cache
+from src.clients import aclose_client
+from src.nodes import (
+    asubject_property_collector,
+    asale_listings_collector,
+    arental_listings_collector,
+    ademographic_stats_collector,
+    subject_property_processor,
+    sale_listings_processor,
+    rental_listings_processor,
+    demographic_stats_processor
+)
+from src.analytics import LISTING_SPECS, listing_metrics, listing_stats, prepare_listings
+from src.schema import memory_report
+from config import DATA_DIR
+
+
+def report(name, timings):
+    print(f"{name}: min {min(timings) * 1000:.1f} ms, median {statistics.median(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms ({len(timings)} runs)")
+
+
+def bench_collectors(args):
+    """Times the four collectors per test case; run against the replay server (`REPLAY_URL`) for repeatable numbers."""
+    response_cache.set_mode("off")
+    with open(f"{DATA_DIR}/test_cases.json", "r") as f:
+        test_cases = json.load(f)
+
+    async def run():
+        timings = []
+        try:
+            for _ in range(args.runs):
+                for test_case in test_cases:
+                    state = {"address": test_case["address"], "property_type": test_case["property_type"]}
+                    start = time.perf_counter()
+                    await asyncio.gather(
+                        asubject_property_collector(state),
+                        asale_listings_collector(state),
+                        arental_listings_collector(state),
+                        ademographic_stats_collector(state)
+                    )
+                    timings.append(time.perf_counter() - start)
+        finally:
+            await aclose_client()
+        return timings
+
+    report("collectors", asyncio.run(run()))
+
+
+def bench_memory(args):
+    """Reports bytes per table before and after the compact dtype schema for every test case."""
+    with open(f"{DATA_DIR}/test_cases.json", "r") as f:
+        test_cases = json.load(f)
+
+    async def collect(state):
+        try:
+            for result in await asyncio.gather(
+                asubject_property_collector(state),
+                asale_listings_collector(state),
+                arental_listings_collector(state),
+                ademographic_stats_collector(state)
+            ):
+                state.update(result)
+        finally:
+            await aclose_client()
+        return state
+
+    for test_case in test_cases:
+        state = asyncio.run(collect({"address": test_case["address"], "property_type": test_case["property_type"]}))
+        before = {
+            "subject_property": pd.json_normalize(state["subject_property"]).rename(columns={
+                "hoa.fee": "hoaFee",
+                "owner.names": "ownerNames",
+                "owner.type": "ownerType"
+            }),
+            "sale_listings": prepare_listings(state["sale_listings"].to_frame(), LISTING_SPECS["sale"]),
+            "rental_listings": prepare_listings(state["rental_listings"].to_frame(), LISTING_SPECS["rental"]),
+            "demographic_stats": pd.DataFrame(state["demographic_stats"])
+        }
+        state.update(subject_property_processor(state))
+        for processor in (sale_listings_processor, rental_listings_processor, demographic_stats_processor):
+            state.update(processor(state))
+        after = {name: state[name] for name in before}
+        before["subject_property"] = before["subject_property"].reindex(columns=after["subject_property"].columns)
+        print(test_case["address"])
+        print(memory_report({name: (before[name], after[name]) for name in before}).to_string(index=False))
+
+
+def synthetic_listings(count, seed=0):
+    rng = np.random.default_rng(seed)
+    listings = pd.DataFrame({
+        "price": rng.uniform(1e5, 1e6, count).round(),
+        "squareFootage": rng.integers(600, 4000, count).astype(float),
+        "yearBuilt": rng.integers(1900, 2025, count).astype(float),
+        "daysOnMarket": rng.integers(0, 365, count).astype(float)
+    })
+    listings.loc[rng.random(count) < 0.05, "squareFootage"] = np.nan
+    listings["pricePerSquareFoot"] = (listings["price"] / listings["squareFootage"]).round(2)
+    return listings
+
+
+def pandas_listing_stats(listings, spec):
+    """The per-column pandas reductions the processors used before the shared engine."""
+    stats = {}
+    for column, label in listing_metrics(spec):
+        stats[f"average{label}"] = listings[column].mean()
+        stats[f"median{label}"] = listings[column].median()
+        stats[f"min{label}"] = listings[column].min()
+        stats[f"max{label}"] = listings[column].max()
+    stats["totalListings"] = len(listings)
+    return pd.DataFrame([stats])
+
+
+def bench_stats(args):
+    """Compares the listings statistics engine with per-column pandas reductions on synthetic listings."""
+    spec = LISTING_SPECS["sale"]
+    for count in args.sizes:
+        listings = synthetic_listings(count)
+        assert np.allclose(listing_stats(listings, spec).to_numpy(float), pandas_listing_stats(listings, spec).to_numpy(float), equal_nan=True)
+        timings = {}
+        for name, func in (("pandas", pandas_listing_stats), ("engine", listing_stats)):
+            runs = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                func(listings, spec)
+                runs.append(time.perf_counter() - start)
+            timings[name] = runs
+            report(f"{name} ({count} listings)", runs)
+        print(f"speedup ({count} listings): {statistics.median(timings['pandas']) / statistics.median(timings['engine']):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline benchmarks.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    collectors = subparsers.add_parser("collectors", help="Collector latency per test case.")
+    collectors.add_argument("--runs", type=int, default=5)
+    collectors.set_defaults(func=bench_collectors)
+    stats = subparsers.add_parser("stats", help="Listings statistics engine vs. per-column pandas reductions.")
+    stats.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    stats.add_argument("--runs", type=int, default=20)
+    stats.set_defaults(func=bench_stats)
+    memory = subparsers.add_parser("memory", help="Bytes per table before and after the compact dtype schema.")
+    memory.set_defaults(func=bench_memory)
+    args = parser.parse_args()
+    args.func(args)
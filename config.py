@@ -8,18 +8,82 @@ BASE_DIR = Path(__file__).resolve().parent
 load_dotenv(BASE_DIR / ".env")
 DATA_DIR = "./data"
 OUTPUT_DIR = "./output"
+CACHE_DIR = "./cache"
+CHARTS_DIR = f"{OUTPUT_DIR}/charts"
+
+# replay: point the collectors at a local stand-in server (see src/replay.py) or record live responses
+REPLAY_URL = os.getenv("REPLAY_URL")
+RECORD_DIR = os.getenv("RECORD_DIR")
+FIXTURES_DIR = f"{DATA_DIR}/fixtures"
 
 # rentcast
 RENTCAST_API_KEY = os.getenv("RENTCAST_API_KEY")
-RENTCAST_URL = "https://api.rentcast.io/v1"
+RENTCAST_URL = f"{REPLAY_URL}/rentcast/v1" if REPLAY_URL else "https://api.rentcast.io/v1"
 MAX_RADIUS = 1.0
+PROPERTY_TYPES = [
+    "Single Family",
+    "Condo",
+    "Townhouse",
+    "Manufactured",
+    "Multi-Family",
+    "Apartment",
+    "Land"
+]
+SWEEP_RADII = [0.25, 0.5, 1.0]
+PAGE_SIZE = 500
+PAGINATION_WINDOW = 4
 
 # argcgis
 ARCGIS_USERNAME = os.getenv("ARCGIS_USERNAME")
 ARCGIS_PASSWORD = os.getenv("ARCGIS_PASSWORD")
-ARCGIS_URL = "https://www.arcgis.com"
+ARCGIS_URL = f"{REPLAY_URL}/arcgis" if REPLAY_URL else "https://www.arcgis.com"
 ARCGIS_TOKEN_URL = f"{ARCGIS_URL}/sharing/rest/generateToken"
-ARCGIS_ENRICH_URL = "https://geoenrich.arcgis.com/arcgis/rest/services/World/geoenrichmentserver/GeoEnrichment/enrich"
+ARCGIS_ENRICH_URL = f"{ARCGIS_URL if REPLAY_URL else 'https://geoenrich.arcgis.com'}/arcgis/rest/services/World/geoenrichmentserver/GeoEnrichment/enrich"
+ARCGIS_TOKEN_EXPIRATION = 2 * 3600
+ARCGIS_TOKEN_REFRESH_MARGIN = 5 * 60
+ARCGIS_BATCH_SIZE = 50
+
+# http
+HTTP_TIMEOUT = 30.0
+HTTP_CONNECT_TIMEOUT = 10.0
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 30.0
+HTTP_MAX_RETRIES = 5
+
+# rate limits: requests per second and burst capacity per provider
+RATE_LIMITS = {
+    "rentcast": (20.0, 20),
+    "arcgis": (10.0, 10),
+    "openai": (5.0, 10),
+    "pandasai": (5.0, 10)
+}
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# cache
+CACHE_PATH = f"{CACHE_DIR}/responses.sqlite3"
+CACHE_MODE = os.getenv("CACHE_MODE", "readwrite")
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_TTL = {
+    "rentcast/properties": 30 * 24 * 3600,
+    "rentcast/listings/sale": 24 * 3600,
+    "rentcast/listings/rental/long-term": 24 * 3600,
+    "arcgis/enrich": 90 * 24 * 3600,
+    "analyzer": 30 * 24 * 3600,
+    "analyzer/code": 90 * 24 * 3600
+}
+SPATIAL_INDEX_PATH = f"{CACHE_DIR}/listings.sqlite3"
+SPATIAL_INDEX_TTL = 24 * 3600
+GEOHASH_PRECISION = 5
+
+# analytics
+TOP_COMPS = 5
+CHART_WORKERS = 4
+CHART_STORE_MAX_BYTES = 256 * 1024 * 1024
+INCREMENTAL_STATS = os.getenv("INCREMENTAL_STATS", "false").lower() == "true"
+STATS_STORE_PATH = f"{CACHE_DIR}/stats.sqlite3"
+SKETCH_RELATIVE_ACCURACY = 0.001
 
 # openai
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -27,4 +91,10 @@ OPENAI_MODEL = "gpt-5"
 MAX_RETRIES = 3
 
 # pandasai
-PANDASAI_MODEL = "o3"
\ No newline at end of file
+PANDASAI_MODEL = "o3"
+ANALYZER_CHARTS_DIR = "exports/charts"
+# Draft agent tools: "pandasai" (natural-language queries), "duckdb" (SQL queries) or "hybrid" (both)
+ANALYZER_BACKEND = os.getenv("ANALYZER_BACKEND", "hybrid")
+ANALYZER_WORKERS = 4
+# Rows of a SQL result returned to the draft agent; larger results are cut with a note
+SQL_MAX_ROWS = 200
\ No newline at end of file
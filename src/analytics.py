@@ -0,0 +1,285 @@
+import numpy as np
+import pandas as pd
+
+from config import TOP_COMPS
+
+
+# Sale and rental listings share one engine; a spec names the value column and its label in the stats table.
+LISTING_SPECS = {
+    "sale": {"value": "price", "label": "Price"},
+    "rental": {"value": "rent", "label": "Rent"}
+}
+
+# Comps are ranked by the absolute difference from the subject in these fields, compared in this order.
+COMP_RANK_FIELDS = ["bedrooms", "bathrooms", "squareFootage", "yearBuilt"]
+
+
+def listing_columns(spec):
+    """Returns the listing table columns for a spec."""
+    return [
+        "addressLine1",
+        "addressLine2",
+        "bedrooms",
+        "bathrooms",
+        "squareFootage",
+        "lotSize",
+        "yearBuilt",
+        "hoaFee",
+        spec["value"],
+        f"{spec['value']}PerSquareFoot",
+        "listedDate",
+        "lastSeenDate",
+        "daysOnMarket"
+    ]
+
+
+def listing_metrics(spec):
+    """Returns (column, label) pairs summarized in the stats table, in output order."""
+    return [
+        (spec["value"], spec["label"]),
+        (f"{spec['value']}PerSquareFoot", f"{spec['label']}PerSquareFoot"),
+        ("squareFootage", "SquareFootage"),
+        ("yearBuilt", "YearBuilt"),
+        ("daysOnMarket", "DaysOnMarket")
+    ]
+
+
+def float_values(frame, column):
+    """Returns a column as float64 with NaN for missing values, whatever its stored dtype."""
+    return frame[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def summarize(values):
+    """
+    Computes mean, median, min and max of a float array, skipping NaN.
+
+    The present values are compacted into one scratch copy and partitioned in place once around the
+    middle; the median is read off the partition, and min and max only scan the half that can hold
+    them, instead of four separate NaN-aware pandas scans. An array without values yields NaN, matching pandas.
+    """
+    missing = np.isnan(values)
+    values = values[~missing] if missing.any() else values.copy()
+    count = len(values)
+    if not count:
+        return {"average": np.nan, "median": np.nan, "min": np.nan, "max": np.nan}
+    middle = count // 2
+    values.partition(middle)
+    lower = values[:middle + 1]
+    median = values[middle] if count % 2 else (values[middle] + values[:middle].max()) / 2
+    return {
+        "average": values.sum() / count,
+        "median": median,
+        "min": lower.min(),
+        "max": values[middle:].max()
+    }
+
+
+def prefix_summaries(values, ends):
+    """
+    Summarizes the prefixes `values[:end]` of a float array for every end, skipping NaN like `summarize`.
+
+    Counts, sums, minima and maxima of all prefixes come from one cumulative pass each; only the median
+    is taken per prefix, from a partition.
+    """
+    present = ~np.isnan(values)
+    counts = np.cumsum(present)
+    sums = np.cumsum(np.where(present, values, 0.0))
+    minima = np.minimum.accumulate(np.where(present, values, np.inf))
+    maxima = np.maximum.accumulate(np.where(present, values, -np.inf))
+    summaries = []
+    for end in ends:
+        if not end or not counts[end - 1]:
+            summaries.append({"average": np.nan, "median": np.nan, "min": np.nan, "max": np.nan})
+            continue
+        summaries.append({
+            "average": sums[end - 1] / counts[end - 1],
+            "median": summarize(values[:end])["median"],
+            "min": minima[end - 1],
+            "max": maxima[end - 1]
+        })
+    return summaries
+
+
+def listing_stats(listings, spec):
+    """Returns the one-row summary statistics table of a listings frame."""
+    stats = {}
+    for column, label in listing_metrics(spec):
+        summary = summarize(float_values(listings, column))
+        stats[f"average{label}"] = summary["average"]
+        stats[f"median{label}"] = summary["median"]
+        stats[f"min{label}"] = summary["min"]
+        stats[f"max{label}"] = summary["max"]
+    stats["totalListings"] = len(listings)
+    return pd.DataFrame([stats])
+
+
+def prepare_listings(listings, spec):
+    """Adds the per-square-foot value column and selects the listing table columns."""
+    value = spec["value"]
+    listings[f"{value}PerSquareFoot"] = (listings[value] / listings["squareFootage"]).round(2)
+    return listings.reindex(columns=listing_columns(spec))
+
+
+def comps_mask(listings, subject_property):
+    """Marks listings within one bedroom and one bathroom of the subject, or within 20% of its living area."""
+    return (
+        (((listings["bedrooms"] - subject_property["bedrooms"]).abs() <= 1) & ((listings["bathrooms"] - subject_property["bathrooms"]).abs() <= 1)) \
+        | listings["squareFootage"].between(subject_property["squareFootage"]*0.80, subject_property["squareFootage"]*1.20, inclusive="both")
+    )
+
+
+def comp_differences(listings, subjects):
+    """
+    Returns the (subjects, fields, listings) matrix of absolute differences in `COMP_RANK_FIELDS`.
+
+    A difference involving a missing value is +inf, so that field ranks the listing last instead of
+    dropping it.
+    """
+    listing_values = np.stack([float_values(listings, field) for field in COMP_RANK_FIELDS])
+    subject_values = np.stack([float_values(subjects, field) for field in COMP_RANK_FIELDS], axis=1)
+    differences = np.abs(listing_values[np.newaxis, :, :] - subject_values[:, :, np.newaxis])
+    differences[np.isnan(differences)] = np.inf
+    return differences
+
+
+def _top_positions(differences, k):
+    """Returns the positions of the k listings that sort first on a (fields, listings) difference matrix."""
+    count = differences.shape[1]
+    candidates = np.arange(count)
+    if count > k:
+        # Only listings tied with or ahead of the k-th smallest first-field difference can make the top k.
+        threshold = np.partition(differences[0], k - 1)[k - 1]
+        candidates = np.flatnonzero(differences[0] <= threshold)
+    # lexsort sorts by its last key first; it is stable, so ties keep listing order.
+    order = np.lexsort(differences[::-1, candidates])
+    return candidates[order[:k]]
+
+
+def rank_comps(comps, subject_property, k=TOP_COMPS):
+    """
+    Returns the k comps most similar to the subject property, most similar first, with a 1-based `rank` column.
+
+    Comps are sorted in ascending order of their absolute differences in bedrooms, then bathrooms, then
+    living area, then year built, as the CMA section of the report defines.
+    """
+    differences = comp_differences(comps, pd.DataFrame([subject_property]))[0]
+    top_comps = comps.iloc[_top_positions(differences, k)].reset_index(drop=True)
+    top_comps.insert(0, "rank", np.arange(1, len(top_comps) + 1))
+    return top_comps
+
+
+def rank_portfolio_comps(listings, subjects, k=TOP_COMPS):
+    """
+    Ranks the top k comps of every subject in a portfolio against one listings frame at once.
+
+    The comps filter and the ranking are evaluated on one (subjects, fields, listings) difference matrix,
+    with listings outside a subject's comps set sorted behind its comps. Returns one long table with the
+    subject's position in `subjects` and the comp `rank`.
+    """
+    differences = comp_differences(listings, subjects)
+    square_footage = float_values(subjects, "squareFootage")[:, np.newaxis]
+    listing_square_footage = float_values(listings, "squareFootage")[np.newaxis, :]
+    eligible = ((differences[:, 0] <= 1) & (differences[:, 1] <= 1)) \
+        | ((listing_square_footage >= square_footage * 0.80) & (listing_square_footage <= square_footage * 1.20))
+    keys = np.concatenate([~eligible[np.newaxis], differences.transpose(1, 0, 2)])
+    order = np.lexsort(keys[::-1], axis=-1)[:, :k]
+    selected = np.take_along_axis(eligible, order, axis=1)
+    subject_positions, ranks = np.nonzero(selected)
+    top_comps = listings.iloc[order[selected]].reset_index(drop=True)
+    top_comps.insert(0, "rank", ranks + 1)
+    top_comps.insert(0, "subject", subject_positions)
+    return top_comps
+
+
+def _value(frame, column):
+    """Returns the first value of a column as a float, or NaN for a missing column, row or value."""
+    if column not in frame or not len(frame):
+        return np.nan
+    return float_values(frame, column)[0]
+
+
+def _ratio(numerator, denominator):
+    """Returns numerator / denominator, or NaN when either is missing or the denominator is zero."""
+    if np.isnan(numerator) or np.isnan(denominator) or denominator == 0:
+        return np.nan
+    return numerator / denominator
+
+
+def share_at_most(values, limit):
+    """Returns the share of present values at or below `limit`, or NaN when no value is present."""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return np.nan
+    return np.count_nonzero(values <= limit) / len(values)
+
+
+def _estimates(square_footage, stats, top_comps, spec):
+    """Returns baseline, comp-implied, minimum and maximum estimates of the subject from per-square-foot values."""
+    label = spec["label"]
+    comp_average = summarize(float_values(top_comps, f"{spec['value']}PerSquareFoot"))["average"]
+    return {
+        "baseline": _value(stats, f"median{label}PerSquareFoot") * square_footage,
+        "compImplied": comp_average * square_footage,
+        "min": _value(stats, f"min{label}PerSquareFoot") * square_footage,
+        "max": _value(stats, f"max{label}PerSquareFoot") * square_footage
+    }
+
+
+def derived_metrics(
+    subject_property,
+    sale_top_comps,
+    sale_listings_stats,
+    sale_listings,
+    rental_top_comps,
+    rental_listings_stats,
+    rental_listings,
+    demographic_stats
+):
+    """
+    Returns the one-row table of figures the draft report derives from the other tables.
+
+    The estimated value and rent are the comp-implied figures, falling back to the baseline when there
+    are no comps; gross rental yield and GRM are computed from them. Shares and rates are ratios in [0, 1].
+    """
+    square_footage = _value(subject_property, "squareFootage")
+    value = _estimates(square_footage, sale_listings_stats, sale_top_comps, LISTING_SPECS["sale"])
+    rent = _estimates(square_footage, rental_listings_stats, rental_top_comps, LISTING_SPECS["rental"])
+    estimated_value = value["baseline"] if np.isnan(value["compImplied"]) else value["compImplied"]
+    estimated_rent = rent["baseline"] if np.isnan(rent["compImplied"]) else rent["compImplied"]
+    housing_units = _value(demographic_stats, "TOTHU_CY")
+    education_base = _value(demographic_stats, "EDUCBASECY")
+    return pd.DataFrame([{
+        "baselineValue": value["baseline"],
+        "compImpliedValue": value["compImplied"],
+        "estimatedValue": estimated_value,
+        "minEstimatedValue": value["min"],
+        "maxEstimatedValue": value["max"],
+        "baselineRent": rent["baseline"],
+        "compImpliedRent": rent["compImplied"],
+        "estimatedRent": estimated_rent,
+        "minEstimatedRent": rent["min"],
+        "maxEstimatedRent": rent["max"],
+        "saleDaysOnMarket30Share": share_at_most(float_values(sale_listings, "daysOnMarket"), 30),
+        "rentalDaysOnMarket30Share": share_at_most(float_values(rental_listings, "daysOnMarket"), 30),
+        "bachelorDegreeShare": _ratio(_value(demographic_stats, "BACHDEG_CY"), education_base),
+        "graduateDegreeShare": _ratio(_value(demographic_stats, "GRADDEG_CY"), education_base),
+        "occupancyRate": _ratio(_value(demographic_stats, "OWNER_CY") + _value(demographic_stats, "RENTER_CY"), housing_units),
+        "vacancyRate": _ratio(_value(demographic_stats, "VACANT_CY"), housing_units),
+        "grossRentalYield": _ratio(estimated_rent * 12, estimated_value),
+        "grossRentMultiplier": _ratio(estimated_value, estimated_rent * 12)
+    }])
+
+
+def bedroom_segments(sale_listings, rental_listings):
+    """Returns median price and rent per square foot and listing counts by bedroom count, in bedroom order."""
+    sale = sale_listings.groupby("bedrooms")["pricePerSquareFoot"].agg(
+        medianPricePerSquareFoot="median",
+        saleListings="size"
+    )
+    rental = rental_listings.groupby("bedrooms")["rentPerSquareFoot"].agg(
+        medianRentPerSquareFoot="median",
+        rentalListings="size"
+    )
+    segments = sale.join(rental, how="outer").sort_index().reset_index()
+    segments[["saleListings", "rentalListings"]] = segments[["saleListings", "rentalListings"]].fillna(0).astype(int)
+    return segments
@@ -0,0 +1,185 @@
+import time
+import json
+import asyncio
+import logging
+import threading
+
+from src.cache import response_cache, make_key
+from src.clients import request_json, arequest_json
+from config import (
+    ARCGIS_USERNAME,
+    ARCGIS_PASSWORD,
+    ARCGIS_URL,
+    ARCGIS_TOKEN_URL,
+    ARCGIS_ENRICH_URL,
+    ARCGIS_TOKEN_EXPIRATION,
+    ARCGIS_TOKEN_REFRESH_MARGIN,
+    ARCGIS_BATCH_SIZE,
+    CACHE_TTL
+)
+
+
+logger = logging.getLogger(__name__)
+
+INVALID_TOKEN_CODES = (498, 499)
+
+
+class TokenManager:
+    """
+    Process-wide ArcGIS token holder.
+
+    The token is reused until it is within `refresh_margin` seconds of expiry, then refreshed under a lock
+    so concurrent runs trigger a single `generateToken` call.
+    """
+
+    def __init__(self, expiration, refresh_margin):
+        self.expiration = expiration
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+
+    def _valid(self):
+        return self._token is not None and time.time() < self._expires_at - self.refresh_margin
+
+    def get_token(self):
+        """Returns a cached token, refreshing it if it is close to expiry."""
+        if self._valid():
+            return self._token
+        with self._lock:
+            if not self._valid():
+                self._refresh()
+            return self._token
+
+    async def aget_token(self):
+        """Returns a cached token without blocking the event loop on a refresh."""
+        if self._valid():
+            return self._token
+        return await asyncio.to_thread(self.get_token)
+
+    def invalidate(self, token):
+        """Drops `token` if it is still the current one, forcing the next call to refresh."""
+        with self._lock:
+            if self._token == token:
+                self._token = None
+
+    def _refresh(self):
+        params = {
+            "username": ARCGIS_USERNAME,
+            "password": ARCGIS_PASSWORD,
+            "referer": ARCGIS_URL,
+            "expiration": self.expiration // 60,
+            "f": "json"
+        }
+        response = request_json("POST", ARCGIS_TOKEN_URL, data=params)
+        if "token" not in response:
+            raise RuntimeError(f"[TokenManager] Token generation failed: {response.get('error')}")
+        self._token = response["token"]
+        expires = response.get("expires")
+        self._expires_at = expires / 1000 if expires else time.time() + self.expiration
+        logger.info(f"[TokenManager] Refreshed ArcGIS token.")
+
+
+token_manager = TokenManager(ARCGIS_TOKEN_EXPIRATION, ARCGIS_TOKEN_REFRESH_MARGIN)
+
+
+def _enrich_key(address, variables):
+    return make_key("arcgis/enrich", address, sorted(variables))
+
+
+def _enrich_params(addresses, variables, token):
+    study_areas = [{
+        "address": {"text": address}
+    } for address in addresses]
+    return {
+        "token": token,
+        "studyAreas": json.dumps(study_areas),
+        "analysisVariables": ",".join(variables),
+        "f": "json"
+    }
+
+
+def _token_rejected(response):
+    return response.get("error", {}).get("code") in INVALID_TOKEN_CODES
+
+
+def _attributes_by_area(response, count):
+    """Maps enrich features back to their study areas by the `ID` index ArcGIS assigns, falling back to order."""
+    if "error" in response:
+        raise RuntimeError(f"[enrich] GeoEnrichment failed: {response['error']}")
+    features = response["results"][0]["value"]["FeatureSet"][0]["features"]
+    attributes = [None] * count
+    for position, feature in enumerate(features):
+        index = feature["attributes"].get("ID")
+        attributes[int(index) if index is not None else position] = feature["attributes"]
+    return attributes
+
+
+def _post_enrich(addresses, variables):
+    token = token_manager.get_token()
+    response = request_json("POST", ARCGIS_ENRICH_URL, data=_enrich_params(addresses, variables, token))
+    if _token_rejected(response):
+        token_manager.invalidate(token)
+        token = token_manager.get_token()
+        response = request_json("POST", ARCGIS_ENRICH_URL, data=_enrich_params(addresses, variables, token))
+    return _attributes_by_area(response, len(addresses))
+
+
+async def _apost_enrich(addresses, variables):
+    token = await token_manager.aget_token()
+    response = await arequest_json("POST", ARCGIS_ENRICH_URL, data=_enrich_params(addresses, variables, token))
+    if _token_rejected(response):
+        token_manager.invalidate(token)
+        token = await token_manager.aget_token()
+        response = await arequest_json("POST", ARCGIS_ENRICH_URL, data=_enrich_params(addresses, variables, token))
+    return _attributes_by_area(response, len(addresses))
+
+
+def enrich_many(addresses, variables):
+    """
+    Returns GeoEnrichment attributes for many addresses, keyed by address.
+
+    Cached areas are served locally; the rest are sent as multi-area `enrich` requests of up to
+    `ARCGIS_BATCH_SIZE` study areas each, and every feature is cached under its own address.
+    Areas ArcGIS could not enrich are left out of the result.
+    """
+    results = {}
+    pending = []
+    for address in dict.fromkeys(addresses):
+        cached = response_cache.get("arcgis/enrich", _enrich_key(address, variables))
+        if cached is not None:
+            results[address] = cached
+        else:
+            pending.append(address)
+    for start in range(0, len(pending), ARCGIS_BATCH_SIZE):
+        chunk = pending[start:start + ARCGIS_BATCH_SIZE]
+        for address, attributes in zip(chunk, _post_enrich(chunk, variables)):
+            if attributes is None:
+                logger.warning(f"[enrich_many] No GeoEnrichment result for {address}.")
+                continue
+            response_cache.set("arcgis/enrich", _enrich_key(address, variables), attributes, CACHE_TTL["arcgis/enrich"])
+            results[address] = attributes
+    if pending:
+        logger.info(f"[enrich_many] Enriched {len(pending)} study areas in {-(-len(pending) // ARCGIS_BATCH_SIZE)} requests.")
+    return results
+
+
+def enrich(address, variables):
+    """Returns GeoEnrichment attributes for the area around `address`, served from the cache when possible."""
+    results = enrich_many([address], variables)
+    if address not in results:
+        raise RuntimeError(f"[enrich] No GeoEnrichment result for {address}.")
+    return results[address]
+
+
+async def aenrich(address, variables):
+    """Returns GeoEnrichment attributes for the area around `address` asynchronously; see `enrich`."""
+    key = _enrich_key(address, variables)
+    cached = response_cache.get("arcgis/enrich", key)
+    if cached is not None:
+        return cached
+    attributes = (await _apost_enrich([address], variables))[0]
+    if attributes is None:
+        raise RuntimeError(f"[enrich] No GeoEnrichment result for {address}.")
+    response_cache.set("arcgis/enrich", key, attributes, CACHE_TTL["arcgis/enrich"])
+    return attributes
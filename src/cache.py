@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+
+from config import (
+    CACHE_PATH,
+    CACHE_MODE,
+    CACHE_MAX_BYTES
+)
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("readwrite", "readonly", "off")
+
+
+def _normalize(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return " ".join(str(value).lower().split())
+
+
+def make_key(namespace, *parts):
+    """Builds a cache key from a namespace and request parts, insensitive to case, spacing and numeric formatting."""
+    payload = json.dumps([namespace, _normalize(list(parts))], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk TTL cache of JSON payloads backed by SQLite.
+
+    Entries are grouped by namespace (e.g. a RentCast endpoint) for hit/miss accounting. When the stored
+    payloads exceed `max_bytes`, the least recently used entries are evicted. The database runs in WAL
+    mode so batch runs and the Streamlit app can share one file.
+    """
+
+    def __init__(self, path, max_bytes, mode="readwrite"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.set_mode(mode)
+        self._conn = None
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def set_mode(self, mode):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Invalid cache mode: {mode}. Expected one of {CACHE_MODES}.")
+        self.mode = mode
+
+    @property
+    def readable(self):
+        return self.mode != "off"
+
+    @property
+    def writable(self):
+        return self.mode == "readwrite"
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    stored_at REAL NOT NULL DEFAULT 0
+                )
+            """)
+            if "stored_at" not in {row[1] for row in conn.execute("PRAGMA table_info(entries)")}:
+                conn.execute("ALTER TABLE entries ADD COLUMN stored_at REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, namespace, key):
+        """Returns the cached payload for `key`, or None if it is missing, expired or the cache is off."""
+        entry = self.get_entry(namespace, key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, namespace, key):
+        """Returns the cached payload for `key` and the time it was stored, or None; see `get`."""
+        if not self.readable:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, expires_at, stored_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                self._counters[namespace]["misses"] += 1
+                return None
+            if self.writable:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            self._counters[namespace]["hits"] += 1
+        return json.loads(row[0]), row[2]
+
+    def set(self, namespace, key, value, ttl):
+        """Stores `value` under `key` for `ttl` seconds and evicts least recently used entries over the size cap."""
+        if not self.writable:
+            return
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, namespace, value, size, expires_at, accessed_at, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, namespace, payload, len(payload), now + ttl, now, now)
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.info(f"[ResponseCache] Evicted {evicted} entries over the {self.max_bytes} byte cap.")
+
+    def stats(self):
+        """Returns hit/miss counters per namespace for this process."""
+        with self._lock:
+            return {namespace: dict(counter) for namespace, counter in self._counters.items()}
+
+
+response_cache = ResponseCache(CACHE_PATH, CACHE_MAX_BYTES, CACHE_MODE)
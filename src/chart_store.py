@@ -0,0 +1,86 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+
+import numpy as np
+
+from config import CHARTS_DIR, ANALYZER_CHARTS_DIR, CHART_STORE_MAX_BYTES
+
+
+logger = logging.getLogger(__name__)
+
+
+def chart_key(spec, *arrays):
+    """Returns the content hash of a JSON-serializable chart spec and the arrays it plots."""
+    digest = hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode())
+    for values in arrays:
+        if values is None:
+            digest.update(b"\0")
+            continue
+        values = np.ascontiguousarray(values)
+        digest.update(str(values.dtype).encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()[:32]
+
+
+class ChartStore:
+    """
+    Content-addressed store of chart PNGs in one directory.
+
+    A chart lives at a path derived from the hash of its spec and input data, so a repeated request finds
+    the rendered file instead of drawing it again. Hits refresh a file's modification time, and when the
+    directory's PNGs exceed `max_bytes`, the least recently used ones are deleted.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path(self, key, name="chart"):
+        return f"{self.directory}/{name}_{key}.png"
+
+    def get(self, path):
+        """Returns `path` and marks it recently used if the chart is stored, else None."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, path, source):
+        """Moves a rendered chart file to its content-addressed `path` and collects the directory."""
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.abspath(source) != os.path.abspath(path):
+            os.replace(source, path)
+        self.collect()
+        return path
+
+    def collect(self):
+        """Deletes the least recently used charts until the directory is within `max_bytes`."""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".png"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            evicted = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted += 1
+            logger.info(f"[ChartStore] Evicted {evicted} charts from {self.directory} over the {self.max_bytes} byte cap.")
+
+
+report_chart_store = ChartStore(CHARTS_DIR, CHART_STORE_MAX_BYTES)
+analyzer_chart_store = ChartStore(ANALYZER_CHARTS_DIR, CHART_STORE_MAX_BYTES)
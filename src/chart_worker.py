@@ -0,0 +1,15 @@
+from multiprocessing import spawn
+
+import src.charts
+
+
+# Preloaded by the forkserver of the chart pool. Workers forked from it only run `src.charts.render_chart`,
+# so they skip re-running the parent's `__main__`, which scripts without a `__main__` guard cannot survive.
+_prepare = spawn.prepare
+
+
+def prepare(preparation_data):
+    _prepare({k: v for k, v in preparation_data.items() if k not in ("init_main_from_name", "init_main_from_path")})
+
+
+spawn.prepare = prepare
@@ -0,0 +1,128 @@
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+from uuid import uuid4
+from concurrent.futures import ProcessPoolExecutor
+
+from src.analytics import float_values
+from src.chart_store import chart_key, report_chart_store
+from config import CHARTS_DIR, CHART_WORKERS
+
+
+logger = logging.getLogger(__name__)
+
+# Style spec of the report charts.
+HISTOGRAM_STYLE = {
+    "color": "skyblue",
+    "alpha": 0.6,
+    "edgecolor": "black",
+    "bins": 8
+}
+SCATTER_STYLE = {
+    "color": "skyblue",
+    "alpha": 0.6,
+    "marker": "o",
+    "s": 100,
+    "edgecolors": "black"
+}
+FIGSIZE = (8, 6)
+DPI = 300
+
+# Fixed report charts: (name, kind, listings kind, x column, y column, title, x label, y label).
+REPORT_CHARTS = [
+    ("sales_hist", "hist", "sale", "price", None, "Sale Listings: Price Distribution", "Price ($)", "Number of Listings"),
+    ("sales_scatter", "scatter", "sale", "squareFootage", "price", "Sale Listings: Price vs. Size", "Living Area (Sq.Ft.)", "Price ($)"),
+    ("rental_hist", "hist", "rental", "rent", None, "Rental Listings: Rent Distribution", "Rent ($)", "Number of Listings"),
+    ("rental_scatter", "scatter", "rental", "squareFootage", "rent", "Rental Listings: Rent vs. Size", "Living Area (Sq.Ft.)", "Rent ($)")
+]
+
+_lock = threading.Lock()
+_pool = None
+
+
+def render_chart(kind, x, y, title, xlabel, ylabel, path):
+    """Renders one chart to a PNG file with the Agg backend; runs in a pool worker."""
+    import numpy as np
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=FIGSIZE, dpi=DPI)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    if kind == "hist":
+        ax.hist(x[~np.isnan(x)], **HISTOGRAM_STYLE)
+    else:
+        present = ~(np.isnan(x) | np.isnan(y))
+        ax.scatter(x[present], y[present], **SCATTER_STYLE)
+    ax.grid(False)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    figure.savefig(path, format="png")
+    return path
+
+
+def get_pool():
+    """Returns the process-wide chart rendering pool."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            # Forking the multi-threaded parent can copy a held lock into a worker, so workers are forked from a
+            # single-threaded server that has imported this module once; `src.chart_worker` keeps them from
+            # re-running the parent's `__main__` as spawned workers would.
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(["src.chart_worker"])
+            else:
+                context = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=CHART_WORKERS, mp_context=context)
+            logger.info(f"[get_pool] Started chart rendering pool with {CHART_WORKERS} workers.")
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def render_report_charts(listings):
+    """
+    Renders the report charts of the given {"sale": DataFrame, "rental": DataFrame} listings in parallel.
+
+    Only the plotted columns are sent to the workers, as float arrays. Charts whose spec and data were
+    rendered before are served from the chart store without rendering. Returns {"<name>_path": path}.
+    """
+    os.makedirs(CHARTS_DIR, exist_ok=True)
+    chart_paths, futures = {}, {}
+    for name, kind, table, x, y, title, xlabel, ylabel in REPORT_CHARTS:
+        frame = listings[table]
+        x_values = float_values(frame, x)
+        y_values = float_values(frame, y) if y else None
+        spec = [kind, title, xlabel, ylabel, HISTOGRAM_STYLE if kind == "hist" else SCATTER_STYLE, FIGSIZE, DPI]
+        path = report_chart_store.path(chart_key(spec, x_values, y_values), name)
+        if report_chart_store.get(path):
+            chart_paths[f"{name}_path"] = path
+            continue
+        # Workers write to a temporary file that is moved into the store once complete.
+        futures[f"{name}_path"] = (path, get_pool().submit(
+            render_chart,
+            kind,
+            x_values,
+            y_values,
+            title,
+            xlabel,
+            ylabel,
+            f"{path}.{uuid4().hex[:8]}.tmp"
+        ))
+    for name, (path, future) in futures.items():
+        chart_paths[name] = report_chart_store.put(path, future.result())
+    logger.info(f"[render_report_charts] Rendered {len(futures)} charts and reused {len(REPORT_CHARTS) - len(futures)}.")
+    return {f"{name}_path": chart_paths[f"{name}_path"] for name, *_ in REPORT_CHARTS}
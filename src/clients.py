@@ -0,0 +1,342 @@
+import time
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import httpx
+
+from config import (
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    PAGE_SIZE,
+    PAGINATION_WINDOW,
+    CACHE_TTL,
+    HTTP_MAX_RETRIES,
+    RECORD_DIR
+)
+from src.cache import response_cache, make_key
+from src.ratelimit import (
+    RETRYABLE_STATUS_CODES,
+    get_limiter,
+    provider_for_url,
+    retry_after_seconds,
+    backoff_delay
+)
+
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_client = None
+_async_clients = weakref.WeakKeyDictionary()
+_in_flight = {}
+_async_in_flight = weakref.WeakKeyDictionary()
+
+
+def _client_options():
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        ),
+        "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    }
+
+
+def get_client():
+    """Returns the process-wide pooled HTTP client."""
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(**_client_options())
+            logger.info(f"[get_client] Opened pooled HTTP client.")
+        return _client
+
+
+def get_async_client():
+    """Returns the pooled async HTTP client bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**_client_options())
+            _async_clients[loop] = client
+            logger.info(f"[get_async_client] Opened pooled async HTTP client.")
+        return client
+
+
+def close_client():
+    """Closes the process-wide pooled HTTP client."""
+    global _client
+    with _lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+async def aclose_client():
+    """Closes the pooled async HTTP client bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def _limiter(url):
+    provider = provider_for_url(url)
+    return get_limiter(provider) if provider else None
+
+
+def _record(url, response):
+    if RECORD_DIR:
+        from src.replay import record
+        record(provider_for_url(url), response)
+
+
+def _retry_delay(limiter, response, attempt, url):
+    """Returns how long to sleep before the next attempt; a `Retry-After` pauses the provider's bucket instead."""
+    retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+    logger.warning(f"[request_json] {response.status_code} from {url}, retry {attempt + 1}/{HTTP_MAX_RETRIES}.")
+    if limiter is not None and retry_after is not None:
+        limiter.pause(retry_after)
+        return 0.0
+    return backoff_delay(attempt, retry_after)
+
+
+def _send(method, url, **kwargs):
+    limiter = _limiter(url)
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        if limiter is not None:
+            limiter.acquire()
+        response = get_client().request(method, url, **kwargs)
+        if response.status_code in RETRYABLE_STATUS_CODES and attempt < HTTP_MAX_RETRIES:
+            time.sleep(_retry_delay(limiter, response, attempt, url))
+            continue
+        response.raise_for_status()
+        _record(url, response)
+        return response.json()
+
+
+async def _asend(method, url, **kwargs):
+    limiter = _limiter(url)
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        if limiter is not None:
+            await limiter.aacquire()
+        response = await get_async_client().request(method, url, **kwargs)
+        if response.status_code in RETRYABLE_STATUS_CODES and attempt < HTTP_MAX_RETRIES:
+            await asyncio.sleep(_retry_delay(limiter, response, attempt, url))
+            continue
+        response.raise_for_status()
+        _record(url, response)
+        return response.json()
+
+
+def _cache_key(cache_namespace, method, url, kwargs):
+    if cache_namespace is None:
+        return None
+    return make_key(cache_namespace, method, url, kwargs.get("params"), kwargs.get("data"))
+
+
+def _fetch_stamped(method, url, cache_namespace, key, **kwargs):
+    fetched_at = time.time()
+    data = _send(method, url, **kwargs)
+    if key is not None:
+        response_cache.set(cache_namespace, key, data, CACHE_TTL[cache_namespace])
+    return data, fetched_at
+
+
+async def _afetch_stamped(method, url, cache_namespace, key, **kwargs):
+    fetched_at = time.time()
+    data = await _asend(method, url, **kwargs)
+    if key is not None:
+        response_cache.set(cache_namespace, key, data, CACHE_TTL[cache_namespace])
+    return data, fetched_at
+
+
+def _request_stamped(method, url, cache_namespace=None, **kwargs):
+    key = _cache_key(cache_namespace, method, url, kwargs)
+    if key is None:
+        return _fetch_stamped(method, url, cache_namespace, key, **kwargs)
+    entry = response_cache.get_entry(cache_namespace, key)
+    if entry is not None:
+        return entry
+    with _lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight[key] = Future()
+    if not leader:
+        return future.result()
+    try:
+        future.set_result(_fetch_stamped(method, url, cache_namespace, key, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    finally:
+        with _lock:
+            _in_flight.pop(key, None)
+    return future.result()
+
+
+async def _arequest_stamped(method, url, cache_namespace=None, **kwargs):
+    key = _cache_key(cache_namespace, method, url, kwargs)
+    if key is None:
+        return await _afetch_stamped(method, url, cache_namespace, key, **kwargs)
+    entry = response_cache.get_entry(cache_namespace, key)
+    if entry is not None:
+        return entry
+    loop = asyncio.get_running_loop()
+    with _lock:
+        in_flight = _async_in_flight.setdefault(loop, {})
+    task = in_flight.get(key)
+    if task is None:
+        task = in_flight[key] = asyncio.ensure_future(_afetch_stamped(method, url, cache_namespace, key, **kwargs))
+        task.add_done_callback(lambda _: in_flight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+def request_json(method, url, cache_namespace=None, **kwargs):
+    """
+    Sends a request through the pooled client and returns the decoded JSON body.
+
+    When `cache_namespace` is given, the body is served from and stored in the response cache
+    for the TTL configured in `CACHE_TTL` for that namespace. Headers are not part of the key.
+    Concurrent callers of the same cached request share one in-flight fetch.
+    """
+    return _request_stamped(method, url, cache_namespace, **kwargs)[0]
+
+
+async def arequest_json(method, url, cache_namespace=None, **kwargs):
+    """Sends a request through the pooled async client and returns the decoded JSON body; see `request_json`."""
+    return (await _arequest_stamped(method, url, cache_namespace, **kwargs))[0]
+
+
+def cached_json(method, url, cache_namespace, **kwargs):
+    """Returns the cached JSON body of a request without sending it, or None when it is not cached."""
+    return response_cache.get(cache_namespace, _cache_key(cache_namespace, method, url, kwargs))
+
+
+def _page_params(params, page):
+    return {**params, "limit": PAGE_SIZE, "offset": page * PAGE_SIZE}
+
+
+class _PageWindow:
+    """
+    Bookkeeping for concurrent offset pagination.
+
+    The first page is requested alone. Each full page that comes back doubles the number of pages allowed in
+    flight, up to `PAGINATION_WINDOW`, so small result sets cost a single request and speculation only grows
+    while pages keep coming back full. Nothing is scheduled once a short page or a failure has been seen.
+
+    Completed pages arrive with the time their response was fetched and are handed to `sink(page, fetched_at)`
+    in offset order as soon as they are contiguous, then released. Pages past the first short page are
+    discarded, so speculative requests beyond the end (which may fail) never affect the result; a failure on
+    a page that is needed is raised.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.pages = {}
+        self.errors = {}
+        self.last_page = None
+        self.next_page = 0
+        self.emitted = 0
+        self.width = 1
+
+    def can_schedule(self, in_flight):
+        return in_flight < self.width and self.last_page is None and not self.errors
+
+    def schedule(self):
+        page = self.next_page
+        self.next_page += 1
+        return page
+
+    def complete(self, page, entry=None, error=None):
+        if error is not None:
+            self.errors[page] = error
+            return
+        self.pages[page] = entry
+        if len(entry[0]) < PAGE_SIZE:
+            if self.last_page is None or page < self.last_page:
+                self.last_page = page
+        else:
+            self.width = min(self.width * 2, PAGINATION_WINDOW)
+        while self.emitted in self.pages and (self.last_page is None or self.emitted <= self.last_page):
+            self.sink(*self.pages.pop(self.emitted))
+            self.emitted += 1
+
+    def finish(self):
+        needed = [page for page in sorted(self.errors) if self.last_page is None or page <= self.last_page]
+        if needed:
+            raise self.errors[needed[0]]
+
+
+def _page_sink(sink, stamped, results):
+    if sink is None:
+        return lambda page, fetched_at: results.extend(page)
+    if not stamped:
+        return lambda page, fetched_at: sink(page)
+    return sink
+
+
+def paginate_json(url, params, sink=None, stamped=False, **kwargs):
+    """
+    Fetches offset-paginated results with a bounded window of concurrent page requests.
+
+    The first page is fetched alone; the window of pages requested ahead then grows while pages come back
+    full, up to `PAGINATION_WINDOW` at once. The first short page marks the end of the results; no pages
+    past it are scheduled. The pages up to it are passed to `sink` in order, or merged into the returned
+    list when no sink is given. With `stamped`, the sink also gets the time each page was fetched, which
+    is its original store time when served from the response cache.
+    """
+    results = []
+    window = _PageWindow(_page_sink(sink, stamped, results))
+    with ThreadPoolExecutor(max_workers=PAGINATION_WINDOW) as executor:
+        pending = {}
+        while True:
+            while window.can_schedule(len(pending)):
+                page = window.schedule()
+                pending[executor.submit(_request_stamped, "GET", url, params=_page_params(params, page), **kwargs)] = page
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = pending.pop(future)
+                if future.exception() is not None:
+                    window.complete(page, error=future.exception())
+                else:
+                    window.complete(page, future.result())
+    window.finish()
+    return results
+
+
+async def apaginate_json(url, params, sink=None, stamped=False, **kwargs):
+    """Fetches offset-paginated results asynchronously; see `paginate_json`."""
+    results = []
+    window = _PageWindow(_page_sink(sink, stamped, results))
+    pending = {}
+    try:
+        while True:
+            while window.can_schedule(len(pending)):
+                page = window.schedule()
+                pending[asyncio.ensure_future(_arequest_stamped("GET", url, params=_page_params(params, page), **kwargs))] = page
+            if not pending:
+                break
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                page = pending.pop(task)
+                if task.exception() is not None:
+                    window.complete(page, error=task.exception())
+                else:
+                    window.complete(page, task.result())
+    finally:
+        for task in pending:
+            task.cancel()
+    window.finish()
+    return results
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from config import PAGE_SIZE
+
+
+def listing_schema(price_column):
+    """Returns the fixed (column, JSON path, dtype) schema of a RentCast listing, with the price stored as `price_column`."""
+    return [
+        ("id", ("id",), object),
+        ("addressLine1", ("addressLine1",), object),
+        ("addressLine2", ("addressLine2",), object),
+        ("propertyType", ("propertyType",), object),
+        ("latitude", ("latitude",), np.float64),
+        ("longitude", ("longitude",), np.float64),
+        ("bedrooms", ("bedrooms",), np.float64),
+        ("bathrooms", ("bathrooms",), np.float64),
+        ("squareFootage", ("squareFootage",), np.float64),
+        ("lotSize", ("lotSize",), np.float64),
+        ("yearBuilt", ("yearBuilt",), np.float64),
+        ("hoaFee", ("hoa", "fee"), np.float64),
+        (price_column, ("price",), np.float64),
+        ("listedDate", ("listedDate",), object),
+        ("lastSeenDate", ("lastSeenDate",), object),
+        ("daysOnMarket", ("daysOnMarket",), np.float64)
+    ]
+
+
+SALE_LISTING_SCHEMA = listing_schema("price")
+RENTAL_LISTING_SCHEMA = listing_schema("rent")
+
+
+def _lookup(record, path):
+    for key in path:
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record
+
+
+class ColumnBuffer:
+    """
+    Growable typed column arrays filled page by page from RentCast JSON.
+
+    Each page is copied straight into preallocated NumPy arrays (float64 with NaN for missing numbers,
+    object for strings), so the raw page can be dropped as soon as it is ingested. Capacity doubles when
+    full; `to_frame` wraps the filled slices without going through record dicts.
+    """
+
+    def __init__(self, schema, capacity=PAGE_SIZE):
+        self.schema = schema
+        self.size = 0
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, _, dtype in schema}
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, count):
+        capacity = len(next(iter(self.columns.values())))
+        if self.size + count <= capacity:
+            return
+        capacity = max(capacity * 2, self.size + count)
+        for name, column in self.columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def append_page(self, records):
+        """Copies a page of listing records into the column arrays."""
+        count = len(records)
+        if not count:
+            return
+        self._reserve(count)
+        end = self.size + count
+        for name, path, dtype in self.schema:
+            values = (_lookup(record, path) for record in records)
+            if dtype is object:
+                self.columns[name][self.size:end] = list(values)
+            else:
+                self.columns[name][self.size:end] = np.fromiter((np.nan if v is None else v for v in values), dtype=dtype, count=count)
+        self.size = end
+
+    def to_frame(self):
+        """Returns the filled columns as a DataFrame in schema order."""
+        return pd.DataFrame({name: self.columns[name][:self.size] for name, _, _ in self.schema}, copy=False)
@@ -1,34 +1,65 @@
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 
-from src.state import State
+from src.state import State, ReportState, ReportOutput
 from src.nodes import (
     subject_property_collector,
+    asubject_property_collector,
     sale_listings_collector,
+    asale_listings_collector,
     rental_listings_collector,
+    arental_listings_collector,
     demographic_stats_collector,
+    ademographic_stats_collector,
     subject_property_processor,
     sale_listings_processor,
     rental_listings_processor,
     demographic_stats_processor,
-    draft_report_generator,
-    final_report_generator,
+    derived_metrics_processor,
+    chart_renderer,
+    section_router,
+    section_writer,
+    section_polisher,
+    summary_writer,
+    report_assembler,
     pdf_converter
 )
 
 
+def build_report_graph():
+    builder = StateGraph(ReportState, input_schema=State, output_schema=ReportOutput)
+
+    # Independent section groups are drafted in parallel. Once all drafts exist, each group is polished in
+    # parallel with the summary sections, which build on the drafts; the reports are assembled from both.
+    builder.add_node("section_writer", section_writer, destinations=("section_polisher",))
+    builder.add_node("section_polisher", section_polisher)
+    builder.add_node("summary_writer", summary_writer)
+    builder.add_node("report_assembler", report_assembler)
+
+    builder.add_conditional_edges(START, section_router, ["section_writer"])
+    builder.add_edge("section_writer", "summary_writer")
+    builder.add_edge("section_polisher", "report_assembler")
+    builder.add_edge("summary_writer", "report_assembler")
+    builder.add_edge("report_assembler", END)
+
+    return builder.compile()
+
+
 def build_graph():
     builder = StateGraph(State)
 
-    builder.add_node("subject_property_collector", subject_property_collector)
-    builder.add_node("sale_listings_collector", sale_listings_collector)
-    builder.add_node("rental_listings_collector", rental_listings_collector)
-    builder.add_node("demographic_stats_collector", demographic_stats_collector)
+    # Collectors carry async variants so the START fan-out shares one event loop under ainvoke.
+    builder.add_node("subject_property_collector", RunnableLambda(subject_property_collector, afunc=asubject_property_collector))
+    builder.add_node("sale_listings_collector", RunnableLambda(sale_listings_collector, afunc=asale_listings_collector))
+    builder.add_node("rental_listings_collector", RunnableLambda(rental_listings_collector, afunc=arental_listings_collector))
+    builder.add_node("demographic_stats_collector", RunnableLambda(demographic_stats_collector, afunc=ademographic_stats_collector))
     builder.add_node("subject_property_processor", subject_property_processor)
     builder.add_node("sale_listings_processor", sale_listings_processor)
     builder.add_node("rental_listings_processor", rental_listings_processor)
     builder.add_node("demographic_stats_processor", demographic_stats_processor)
-    builder.add_node("draft_report_generator", draft_report_generator)
-    builder.add_node("final_report_generator", final_report_generator)
+    builder.add_node("derived_metrics_processor", derived_metrics_processor)
+    builder.add_node("chart_renderer", chart_renderer)
+    builder.add_node("report_generator", build_report_graph())
     builder.add_node("pdf_converter", pdf_converter)
     
     builder.add_edge(START, "subject_property_collector")
@@ -41,12 +72,15 @@ def build_graph():
     builder.add_edge("sale_listings_collector", "sale_listings_processor")
     builder.add_edge("rental_listings_collector", "rental_listings_processor")
     builder.add_edge("demographic_stats_collector", "demographic_stats_processor")
-    builder.add_edge("subject_property_processor", "draft_report_generator")
-    builder.add_edge("sale_listings_processor", "draft_report_generator")
-    builder.add_edge("rental_listings_processor", "draft_report_generator")
-    builder.add_edge("demographic_stats_processor", "draft_report_generator")
-    builder.add_edge("draft_report_generator", "final_report_generator")
-    builder.add_edge("final_report_generator", "pdf_converter")
+    builder.add_edge("subject_property_processor", "derived_metrics_processor")
+    builder.add_edge("sale_listings_processor", "derived_metrics_processor")
+    builder.add_edge("rental_listings_processor", "derived_metrics_processor")
+    builder.add_edge("demographic_stats_processor", "derived_metrics_processor")
+    builder.add_edge("sale_listings_processor", "chart_renderer")
+    builder.add_edge("rental_listings_processor", "chart_renderer")
+    builder.add_edge("derived_metrics_processor", "report_generator")
+    builder.add_edge("chart_renderer", "report_generator")
+    builder.add_edge("report_generator", "pdf_converter")
     builder.add_edge("pdf_converter", END)
 
     return builder.compile()
\ No newline at end of file
@@ -1,31 +1,54 @@
+import time
+import asyncio
 import logging
 import functools
-import json
 from uuid import uuid4
 
-import requests
 import pandas as pd
+from langgraph.types import Command, Send
 from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
 from markdown_pdf import MarkdownPdf, Section
 
-from src.state import State, AnalyzerState
-from src.tools import data_analyzer
+from src.state import State, ReportState, SectionState, PolishState
+from src.tools import AnalyzerSession, get_analyzer_tools
+from src.clients import request_json, arequest_json, cached_json, paginate_json, apaginate_json
+from src.arcgis import enrich, aenrich
+from src.cache import response_cache, make_key
+from src.spatial import listings_index
+from src.stats_store import stats_store
+from src.charts import render_report_charts
+from src.schema import SUBJECT_PROPERTY_DTYPES, listing_dtypes, demographic_dtypes, apply_schema
+from src.columnar import ColumnBuffer, SALE_LISTING_SCHEMA, RENTAL_LISTING_SCHEMA
+from src.analytics import (
+    LISTING_SPECS,
+    prepare_listings,
+    comps_mask,
+    rank_comps,
+    listing_stats,
+    derived_metrics,
+    bedroom_segments
+)
+from src.ratelimit import BucketRateLimiter, get_limiter, backoff_delay
 from src.prompts import (
-    DRAFT_REPORT_GENERATOR_PROMPT,
-    FINAL_REPORT_GENERATOR_PROMPT
+    DRAFT_SECTION_GROUPS,
+    DRAFT_SUMMARY_GROUP,
+    REPORT_TITLE,
+    REPORT_SECTIONS,
+    draft_section_prompt,
+    final_section_prompt,
+    split_sections
 )
 from config import (
     RENTCAST_API_KEY,
     RENTCAST_URL,
     MAX_RADIUS,
-    ARCGIS_USERNAME,
-    ARCGIS_PASSWORD,
-    ARCGIS_URL,
-    ARCGIS_ENRICH_URL,
     OPENAI_MODEL,
     MAX_RETRIES,
-    OUTPUT_DIR
+    OUTPUT_DIR,
+    INCREMENTAL_STATS,
+    ANALYZER_BACKEND,
+    ANALYZER_WORKERS
 )
 
 
@@ -35,6 +58,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEMOGRAPHIC_VARIABLES = [
+    "AGEBASE_CY",
+    "POPGRW20CY",
+    "POPGRWCYFY",
+    "TOTHH_CY",
+    "HHGRW20CY",
+    "HHGRWCYFY",
+    "AVGHHSZ_CY",
+    "MEDHINC_CY",
+    "MHIGRWCYFY",
+    "AVGHINC_CY",
+    "PCI_CY",
+    "MEDDI_CY",
+    "MEDVAL_CY",
+    "AVGVAL_CY",
+    "EMP_CY",
+    "UNEMPRT_CY",
+    "DPOP_CY",
+    "DPOPWRK_CY",
+    "TOTHU_CY",
+    "VACANT_CY",
+    "OWNER_CY",
+    "RENTER_CY",
+    "EDUCBASECY",
+    "BACHDEG_CY",
+    "GRADDEG_CY"
+]
+
 
 def retry():
     def decorator(func):
@@ -46,6 +97,7 @@ def retry():
                 except Exception as e:
                     if attempt < MAX_RETRIES:
                         logger.warning(f"[{func.__name__}] Retry {attempt + 1}/{MAX_RETRIES} failed: {e}")
+                        time.sleep(backoff_delay(attempt))
                     else:
                         logger.error(f"[{func.__name__}] Exceeded max retries.", exc_info=True)
                         raise RuntimeError(f"[{func.__name__}] failed after max retries.") from e
@@ -53,16 +105,113 @@ def retry():
     return decorator
 
 
+def _rentcast_headers():
+    return {"X-Api-Key": RENTCAST_API_KEY or ""}
+
+
+def _subject_property_url(state: State):
+    address = state["address"]
+    id = address.replace(" ", "-")
+    return f"{RENTCAST_URL}/properties/{id}"
+
+
+def _listings_params(state: State):
+    return {
+        "address": state["address"],
+        "radius": MAX_RADIUS,
+        "propertyType": state["property_type"]
+    }
+
+
+def _cached_coordinates(state: State):
+    """Returns the subject's coordinates when its details are already cached, else (None, None) without a request."""
+    subject_property = cached_json("GET", _subject_property_url(state), cache_namespace="rentcast/properties", headers=_rentcast_headers())
+    if subject_property is None:
+        return None, None
+    return subject_property.get("latitude"), subject_property.get("longitude")
+
+
+def _indexed_listings(state: State, kind, schema, latitude, longitude):
+    """Returns a column buffer filled from the spatial index, or None when no fresh disc covers the subject."""
+    listings = listings_index.query(kind, state["property_type"], latitude, longitude, MAX_RADIUS)
+    if listings is None:
+        return None
+    buffer = ColumnBuffer(schema)
+    buffer.append_page(listings)
+    logger.info(f"[_indexed_listings] Served {len(listings)} {kind} listings from the spatial index.")
+    return buffer
+
+
+def _collect_listings(state: State, kind, endpoint, schema):
+    """
+    Streams listings into a column buffer from the local spatial index when a fresh disc covers the cached subject,
+    else from RentCast without waiting for the subject's details.
+
+    Fetched pages feed the index at the time they were fetched from RentCast, which for a page served from the
+    response cache is when it was stored. The disc is dated by its oldest page and recorded once the subject's
+    coordinates are known, joining the subject collector's in-flight request if need be.
+    """
+    latitude, longitude = _cached_coordinates(state)
+    buffer = _indexed_listings(state, kind, schema, latitude, longitude)
+    if buffer is not None:
+        return buffer
+    buffer = ColumnBuffer(schema)
+    oldest = time.time()
+
+    def sink(page, fetched_at):
+        nonlocal oldest
+        buffer.append_page(page)
+        listings_index.add_listings(kind, state["property_type"], page, fetched_at)
+        oldest = min(oldest, fetched_at)
+
+    paginate_json(f"{RENTCAST_URL}/{endpoint}", _listings_params(state), sink=sink, stamped=True, cache_namespace=f"rentcast/{endpoint}", headers=_rentcast_headers())
+    if response_cache.writable and latitude is None:
+        subject_property = request_json("GET", _subject_property_url(state), cache_namespace="rentcast/properties", headers=_rentcast_headers())
+        latitude, longitude = subject_property.get("latitude"), subject_property.get("longitude")
+    listings_index.add_coverage(kind, state["property_type"], latitude, longitude, MAX_RADIUS, oldest)
+    return buffer
+
+
+async def _acollect_listings(state: State, kind, endpoint, schema):
+    """
+    Streams listings into a column buffer from the local spatial index or RentCast asynchronously; see
+    `_collect_listings`. SQLite reads and writes of the cache and the index run in worker threads.
+    """
+    latitude, longitude = await asyncio.to_thread(_cached_coordinates, state)
+    buffer = await asyncio.to_thread(_indexed_listings, state, kind, schema, latitude, longitude)
+    if buffer is not None:
+        return buffer
+    buffer = ColumnBuffer(schema)
+    oldest = time.time()
+    writes = []
+
+    def sink(page, fetched_at):
+        nonlocal oldest
+        buffer.append_page(page)
+        writes.append(asyncio.ensure_future(asyncio.to_thread(listings_index.add_listings, kind, state["property_type"], page, fetched_at)))
+        oldest = min(oldest, fetched_at)
+
+    await apaginate_json(f"{RENTCAST_URL}/{endpoint}", _listings_params(state), sink=sink, stamped=True, cache_namespace=f"rentcast/{endpoint}", headers=_rentcast_headers())
+    await asyncio.gather(*writes)
+    if response_cache.writable and latitude is None:
+        subject_property = await arequest_json("GET", _subject_property_url(state), cache_namespace="rentcast/properties", headers=_rentcast_headers())
+        latitude, longitude = subject_property.get("latitude"), subject_property.get("longitude")
+    await asyncio.to_thread(listings_index.add_coverage, kind, state["property_type"], latitude, longitude, MAX_RADIUS, oldest)
+    return buffer
+
+
 def subject_property_collector(state: State):
     """Collects subject property details from RentCast."""
     logger.info(f"[subject_property_collector] Started subject property collecting.")
-    address = state["address"]
-    id = address.replace(" ", "-")
-    url = f"{RENTCAST_URL}/properties/{id}"
-    headers = {"X-Api-Key": RENTCAST_API_KEY}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    subject_property = response.json()
+    subject_property = request_json("GET", _subject_property_url(state), cache_namespace="rentcast/properties", headers=_rentcast_headers())
+    logger.info(f"[subject_property_collector] Completed subject property collecting.")
+    return {"subject_property": [subject_property]}
+
+
+async def asubject_property_collector(state: State):
+    """Collects subject property details from RentCast asynchronously."""
+    logger.info(f"[subject_property_collector] Started subject property collecting.")
+    subject_property = await arequest_json("GET", _subject_property_url(state), cache_namespace="rentcast/properties", headers=_rentcast_headers())
     logger.info(f"[subject_property_collector] Completed subject property collecting.")
     return {"subject_property": [subject_property]}
 
@@ -70,27 +219,15 @@ def subject_property_collector(state: State):
 def sale_listings_collector(state: State):
     """Collects nearby sale listings from RentCast."""
     logger.info(f"[sale_listings_collector] Started sale listings collecting.")
-    address = state["address"]
-    property_type = state["property_type"]
-    url = f"{RENTCAST_URL}/listings/sale"
-    headers = {"X-Api-Key": RENTCAST_API_KEY}
-    params = {
-        "address": address,
-        "radius": MAX_RADIUS,
-        "propertyType": property_type,
-        "limit": 500,
-        "offset": 0
-    }
-    sale_listings = []
-    while True:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
-        sale_listings.extend(data)
-        if len(data) < params["limit"]:
-            break
-        else:
-            params["offset"] += 500
+    sale_listings = _collect_listings(state, "sale", "listings/sale", SALE_LISTING_SCHEMA)
+    logger.info(f"[sale_listings_collector] Completed sale listings collecting.")
+    return {"sale_listings": sale_listings}
+
+
+async def asale_listings_collector(state: State):
+    """Collects nearby sale listings from RentCast asynchronously."""
+    logger.info(f"[sale_listings_collector] Started sale listings collecting.")
+    sale_listings = await _acollect_listings(state, "sale", "listings/sale", SALE_LISTING_SCHEMA)
     logger.info(f"[sale_listings_collector] Completed sale listings collecting.")
     return {"sale_listings": sale_listings}
 
@@ -98,27 +235,15 @@ def sale_listings_collector(state: State):
 def rental_listings_collector(state: State):
     """Collects nearby rental listings from RentCast."""
     logger.info(f"[rental_listings_collector] Started rental listings collecting.")
-    address = state["address"]
-    property_type = state["property_type"]
-    url = f"{RENTCAST_URL}/listings/rental/long-term"
-    headers = {"X-Api-Key": RENTCAST_API_KEY}
-    params = {
-        "address": address,
-        "radius": MAX_RADIUS,
-        "propertyType": property_type,
-        "limit": 500,
-        "offset": 0
-    }
-    rental_listings = []
-    while True:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
-        rental_listings.extend(data)
-        if len(data) < params["limit"]:
-            break
-        else:
-            params["offset"] += 500
+    rental_listings = _collect_listings(state, "rental", "listings/rental/long-term", RENTAL_LISTING_SCHEMA)
+    logger.info(f"[rental_listings_collector] Completed rental listings collecting.")
+    return {"rental_listings": rental_listings}
+
+
+async def arental_listings_collector(state: State):
+    """Collects nearby rental listings from RentCast asynchronously."""
+    logger.info(f"[rental_listings_collector] Started rental listings collecting.")
+    rental_listings = await _acollect_listings(state, "rental", "listings/rental/long-term", RENTAL_LISTING_SCHEMA)
     logger.info(f"[rental_listings_collector] Completed rental listings collecting.")
     return {"rental_listings": rental_listings}
 
@@ -126,57 +251,27 @@ def rental_listings_collector(state: State):
 def demographic_stats_collector(state: State):
     """Collects nearby demographic statistics from ArcGIS."""
     logger.info(f"[demographic_stats_collector] Started demographic statistics collecting.")
-    address = state["address"]
-    params = {
-        "username": ARCGIS_USERNAME,
-        "password": ARCGIS_PASSWORD,
-        "referer": ARCGIS_URL,
-        "f": "json"
-    }
-    response = requests.post(f"{ARCGIS_URL}/sharing/rest/generateToken", data=params)
-    token = response.json().get("token")
-    study_areas = [{
-        "address": {"text": address}
-    }]
-    variables = [
-        "AGEBASE_CY",
-        "POPGRW20CY",
-        "POPGRWCYFY",
-        "TOTHH_CY",
-        "HHGRW20CY",
-        "HHGRWCYFY",
-        "AVGHHSZ_CY",
-        "MEDHINC_CY",
-        "MHIGRWCYFY",
-        "AVGHINC_CY",
-        "PCI_CY",
-        "MEDDI_CY",
-        "MEDVAL_CY",
-        "AVGVAL_CY",
-        "EMP_CY",
-        "UNEMPRT_CY",
-        "DPOP_CY",
-        "DPOPWRK_CY",
-        "TOTHU_CY",
-        "VACANT_CY",
-        "OWNER_CY",
-        "RENTER_CY",
-        "EDUCBASECY",
-        "BACHDEG_CY",
-        "GRADDEG_CY"
-    ]
-    params = {
-        "token": token,
-        "studyAreas": json.dumps(study_areas),
-        "analysisVariables": ",".join(variables),
-        "f": "json"
-    }
-    response = requests.post(ARCGIS_ENRICH_URL, data=params)
-    demographic_stats = response.json()["results"][0]["value"]["FeatureSet"][0]["features"][0]['attributes']
+    demographic_stats = enrich(state["address"], DEMOGRAPHIC_VARIABLES)
+    logger.info(f"[demographic_stats_collector] Completed demographic statistics collecting.")
+    return {"demographic_stats": [demographic_stats]}
+
+
+async def ademographic_stats_collector(state: State):
+    """Collects nearby demographic statistics from ArcGIS asynchronously."""
+    logger.info(f"[demographic_stats_collector] Started demographic statistics collecting.")
+    demographic_stats = await aenrich(state["address"], DEMOGRAPHIC_VARIABLES)
     logger.info(f"[demographic_stats_collector] Completed demographic statistics collecting.")
     return {"demographic_stats": [demographic_stats]}
 
 
+def _subject_record(state: State):
+    """Returns the subject property as a single record, whether or not its processor has already run."""
+    subject_property = state["subject_property"]
+    if isinstance(subject_property, pd.DataFrame):
+        return subject_property.iloc[0]
+    return subject_property[0]
+
+
 def subject_property_processor(state: State):
     """Processes subject property data."""
     logger.info(f"[subject_property_processor] Started subject property processing.")
@@ -200,129 +295,52 @@ def subject_property_processor(state: State):
         "ownerNames",
         "ownerType"
     ]
-    subject_property = subject_property.reindex(columns=columns)
+    subject_property = apply_schema(subject_property.reindex(columns=columns), SUBJECT_PROPERTY_DTYPES)
     logger.info(f"[subject_property_processor] Completed subject property processing.")
-    return {"subject_property": subject_property.to_dict(orient="records")}
+    return {"subject_property": subject_property}
+
+
+def _listings_stats(state: State, kind, ids, listings, spec):
+    """Refreshes the submarket's incremental statistics when enabled, else computes them from scratch."""
+    stats = None
+    if INCREMENTAL_STATS:
+        submarket = make_key("stats", kind, _listings_params(state))
+        stats = stats_store.refresh(submarket, ids, listings, spec)
+    if stats is None:
+        stats = listing_stats(listings, spec)
+    return stats
+
+
+def _listings_processor(state: State, kind):
+    subject_property = _subject_record(state)
+    spec = LISTING_SPECS[kind]
+    frame = state[f"{kind}_listings"].to_frame()
+    listings = apply_schema(prepare_listings(frame, spec), listing_dtypes(spec))
+    comps = listings.loc[comps_mask(listings, subject_property)].reset_index(drop=True)
+    top_comps = rank_comps(comps, subject_property)
+    stats = _listings_stats(state, kind, frame["id"], listings, spec)
+    return {
+        f"{kind}_listings": listings,
+        f"{kind}_comps": comps,
+        f"{kind}_top_comps": top_comps,
+        f"{kind}_listings_stats": stats
+    }
 
 
 def sale_listings_processor(state: State):
-    """Processes sale listings and computes summary statistics."""
+    """Processes sale listings, ranks comps and computes summary statistics."""
     logger.info(f"[sale_listings_processor] Started sale listings processing.")
-    subject_property = state["subject_property"][0]
-    sale_listings = state["sale_listings"]
-    sale_listings = pd.json_normalize(sale_listings)
-    sale_listings.rename(columns={"hoa.fee": "hoaFee"}, inplace=True)
-    sale_listings["pricePerSquareFoot"] = (sale_listings["price"] / sale_listings["squareFootage"]).round(2)
-    columns = [
-        "addressLine1",
-        "addressLine2",
-        "bedrooms",
-        "bathrooms",
-        "squareFootage",
-        "lotSize",
-        "yearBuilt",
-        "hoaFee",
-        "price",
-        "pricePerSquareFoot",
-        "listedDate",
-        "lastSeenDate",
-        "daysOnMarket"
-    ]
-    sale_listings = sale_listings.reindex(columns=columns)
-    mask = (
-        (((sale_listings["bedrooms"] - subject_property["bedrooms"]).abs() <= 1) & ((sale_listings["bathrooms"] - subject_property["bathrooms"]).abs() <= 1)) \
-        | sale_listings["squareFootage"].between(subject_property["squareFootage"]*0.80, subject_property["squareFootage"]*1.20, inclusive="both")
-    )
-    sale_comps = sale_listings.loc[mask]
-    sale_listings_stats = pd.DataFrame([{
-        "averagePrice": sale_listings["price"].mean(),
-        "medianPrice": sale_listings["price"].median(),
-        "minPrice": sale_listings["price"].min(),
-        "maxPrice": sale_listings["price"].max(),
-        "averagePricePerSquareFoot": sale_listings["pricePerSquareFoot"].mean(),
-        "medianPricePerSquareFoot": sale_listings["pricePerSquareFoot"].median(),
-        "minPricePerSquareFoot": sale_listings["pricePerSquareFoot"].min(),
-        "maxPricePerSquareFoot": sale_listings["pricePerSquareFoot"].max(),
-        "averageSquareFootage": sale_listings["squareFootage"].mean(),
-        "medianSquareFootage": sale_listings["squareFootage"].median(),
-        "minSquareFootage": sale_listings["squareFootage"].min(),
-        "maxSquareFootage": sale_listings["squareFootage"].max(),
-        "averageYearBuilt": sale_listings["yearBuilt"].mean(),
-        "medianYearBuilt": sale_listings["yearBuilt"].median(),
-        "minYearBuilt": sale_listings["yearBuilt"].min(),
-        "maxYearBuilt": sale_listings["yearBuilt"].max(),
-        "averageDaysOnMarket": sale_listings["daysOnMarket"].mean(),
-        "medianDaysOnMarket": sale_listings["daysOnMarket"].median(),
-        "minDaysOnMarket": sale_listings["daysOnMarket"].min(),
-        "maxDaysOnMarket": sale_listings["daysOnMarket"].max(),
-        "totalListings": len(sale_listings)
-    }])
+    result = _listings_processor(state, "sale")
     logger.info(f"[sale_listings_processor] Completed sale listings processing.")
-    return {
-        "sale_listings": sale_listings.to_dict(orient="records"),
-        "sale_comps": sale_comps.to_dict(orient="records"),
-        "sale_listings_stats": sale_listings_stats.to_dict(orient="records")
-    }
+    return result
 
 
 def rental_listings_processor(state: State):
-    """Processes rental listings and computes summary statistics."""
+    """Processes rental listings, ranks comps and computes summary statistics."""
     logger.info(f"[rental_listings_processor] Started rental listings processing.")
-    subject_property = state["subject_property"][0]
-    rental_listings = state["rental_listings"]
-    rental_listings = pd.json_normalize(rental_listings)
-    rental_listings.rename(columns={"hoa.fee": "hoaFee", "price": "rent"}, inplace=True)
-    rental_listings["rentPerSquareFoot"] = (rental_listings["rent"] / rental_listings["squareFootage"]).round(2)
-    columns = [
-        "addressLine1",
-        "addressLine2",
-        "bedrooms",
-        "bathrooms",
-        "squareFootage",
-        "lotSize",
-        "yearBuilt",
-        "hoaFee",
-        "rent",
-        "rentPerSquareFoot",
-        "listedDate",
-        "lastSeenDate",
-        "daysOnMarket"
-    ]
-    rental_listings = rental_listings.reindex(columns=columns)
-    mask = (
-        (((rental_listings["bedrooms"] - subject_property["bedrooms"]).abs() <= 1) & ((rental_listings["bathrooms"] - subject_property["bathrooms"]).abs() <= 1)) \
-        | rental_listings["squareFootage"].between(subject_property["squareFootage"]*0.80, subject_property["squareFootage"]*1.20, inclusive="both")
-    )
-    rental_comps = rental_listings.loc[mask]
-    rental_listings_stats = pd.DataFrame([{
-        "averageRent": rental_listings["rent"].mean(),
-        "medianRent": rental_listings["rent"].median(),
-        "minRent": rental_listings["rent"].min(),
-        "maxRent": rental_listings["rent"].max(),
-        "averageRentPerSquareFoot": rental_listings["rentPerSquareFoot"].mean(),
-        "medianRentPerSquareFoot": rental_listings["rentPerSquareFoot"].median(),
-        "minRentPerSquareFoot": rental_listings["rentPerSquareFoot"].min(),
-        "maxRentPerSquareFoot": rental_listings["rentPerSquareFoot"].max(),
-        "averageSquareFootage": rental_listings["squareFootage"].mean(),
-        "medianSquareFootage": rental_listings["squareFootage"].median(),
-        "minSquareFootage": rental_listings["squareFootage"].min(),
-        "maxSquareFootage": rental_listings["squareFootage"].max(),
-        "averageYearBuilt": rental_listings["yearBuilt"].mean(),
-        "medianYearBuilt": rental_listings["yearBuilt"].median(),
-        "minYearBuilt": rental_listings["yearBuilt"].min(),
-        "maxYearBuilt": rental_listings["yearBuilt"].max(),
-        "averageDaysOnMarket": rental_listings["daysOnMarket"].mean(),
-        "medianDaysOnMarket": rental_listings["daysOnMarket"].median(),
-        "minDaysOnMarket": rental_listings["daysOnMarket"].min(),
-        "maxDaysOnMarket": rental_listings["daysOnMarket"].max(),
-        "totalListings": len(rental_listings)
-    }])
+    result = _listings_processor(state, "rental")
     logger.info(f"[rental_listings_processor] Completed rental listings processing.")
-    return {
-        "rental_listings": rental_listings.to_dict(orient="records"),
-        "rental_comps": rental_comps.to_dict(orient="records"),
-        "rental_listings_stats": rental_listings_stats.to_dict(orient="records")
-    }
+    return result
 
 
 def demographic_stats_processor(state: State):
@@ -330,96 +348,139 @@ def demographic_stats_processor(state: State):
     logger.info(f"[demographic_stats_processor] Started demographic statistics processing.")
     demographic_stats = state["demographic_stats"]
     demographic_stats = pd.DataFrame(demographic_stats)
-    columns = [
-        "AGEBASE_CY",
-        "POPGRW20CY",
-        "POPGRWCYFY",
-        "TOTHH_CY",
-        "HHGRW20CY",
-        "HHGRWCYFY",
-        "AVGHHSZ_CY",
-        "MEDHINC_CY",
-        "MHIGRWCYFY",
-        "AVGHINC_CY",
-        "PCI_CY",
-        "MEDDI_CY",
-        "MEDVAL_CY",
-        "AVGVAL_CY",
-        "EMP_CY",
-        "UNEMPRT_CY",
-        "DPOP_CY",
-        "DPOPWRK_CY",
-        "TOTHU_CY",
-        "VACANT_CY",
-        "OWNER_CY",
-        "RENTER_CY",
-        "EDUCBASECY",
-        "BACHDEG_CY",
-        "GRADDEG_CY"
-    ]
-    demographic_stats = demographic_stats.reindex(columns=columns)
+    columns = DEMOGRAPHIC_VARIABLES
+    demographic_stats = apply_schema(demographic_stats.reindex(columns=columns), demographic_dtypes(columns))
     logger.info(f"[demographic_stats_processor] Completed demographic statistics processing.")
-    return {"demographic_stats": demographic_stats.to_dict(orient="records")}
+    return {"demographic_stats": demographic_stats}
+
+
+def derived_metrics_processor(state: State):
+    """Computes the derived metrics and bedroom segments of the draft report."""
+    logger.info(f"[derived_metrics_processor] Started derived metrics processing.")
+    metrics = derived_metrics(
+        state["subject_property"],
+        state["sale_top_comps"],
+        state["sale_listings_stats"],
+        state["sale_listings"],
+        state["rental_top_comps"],
+        state["rental_listings_stats"],
+        state["rental_listings"],
+        state["demographic_stats"]
+    )
+    segments = bedroom_segments(state["sale_listings"], state["rental_listings"])
+    logger.info(f"[derived_metrics_processor] Completed derived metrics processing.")
+    return {"derived_metrics": metrics, "bedroom_segments": segments}
+
+
+def chart_renderer(state: State):
+    """Renders the report charts from the processed listings."""
+    logger.info(f"[chart_renderer] Started chart rendering.")
+    chart_paths = render_report_charts({"sale": state["sale_listings"], "rental": state["rental_listings"]})
+    logger.info(f"[chart_renderer] Completed chart rendering.")
+    return {"chart_paths": chart_paths}
 
 
 @retry()
-def draft_report_generator(state: State):
-    """Generates a draft report using the collected datasets."""
-    logger.info(f"[draft_report_generator] Started draft report generating.")
-    address = state["address"]
-    property_type = state["property_type"]
-    subject_property = state["subject_property"]
-    sale_listings = state["sale_listings"]
-    sale_comps = state["sale_comps"]
-    sale_listings_stats = state["sale_listings_stats"]
-    rental_listings = state["rental_listings"]
-    rental_comps = state["rental_comps"]
-    rental_listings_stats = state["rental_listings_stats"]
-    demographic_stats = state["demographic_stats"]
-    llm = ChatOpenAI(model=OPENAI_MODEL, reasoning_effort="high")
+def _draft_sections(state: State, group, drafted_sections=None):
+    """Runs a ReAct analyzer agent over a group's tables and charts and returns its drafted sections."""
+    analyzer_session = AnalyzerSession({name: state[name] for name in group["tables"]})
+    llm = ChatOpenAI(model=OPENAI_MODEL, reasoning_effort="high", rate_limiter=BucketRateLimiter(get_limiter("openai")))
     agent = create_react_agent(
         model=llm,
-        tools=[data_analyzer],  
-        prompt=DRAFT_REPORT_GENERATOR_PROMPT,
-        state_schema=AnalyzerState
+        tools=get_analyzer_tools(ANALYZER_BACKEND),
+        prompt=draft_section_prompt(group["sections"], group["tables"], ANALYZER_BACKEND)
     )
+    charts = [f"- {name}: {state['chart_paths'][name]}" for name in group["charts"]]
     response = agent.invoke({
         "messages": "\n".join([
-            "Generate a draft report for the following property.",
-            f"Address: {address}",
-            f"Property Type: {property_type}"
-        ]),
-        "subject_property": subject_property,
-        "sale_listings": sale_listings,
-        "sale_comps": sale_comps,
-        "sale_listings_stats": sale_listings_stats,
-        "rental_listings": rental_listings,
-        "rental_comps": rental_comps,
-        "rental_listings_stats": rental_listings_stats,
-        "demographic_stats": demographic_stats
-    }, config={"recursion_limit": 150})
-    draft_report = response["messages"][-1].content
-    logger.info(f"[draft_report_generator] Completed draft report generating.")
-    return {"draft_report": draft_report}
+            f"Generate the {', '.join(group['sections'])} sections of the draft report for the following property.",
+            f"Address: {state['address']}",
+            f"Property Type: {state['property_type']}",
+            *(["Chart Paths:", *charts] if charts else []),
+            *([f"Drafted Sections:\n{drafted_sections}"] if drafted_sections else [])
+        ])
+    }, config={
+        "recursion_limit": 150,
+        "max_concurrency": ANALYZER_WORKERS,
+        "configurable": {"analyzer_session": analyzer_session}
+    })
+    return response["messages"][-1].content
 
 
 @retry()
-def final_report_generator(state: State):
-    """Generates a final report based on the draft."""
-    logger.info(f"[final_report_generator] Started final report generating.")
-    draft_report = state["draft_report"]
-    llm = ChatOpenAI(model=OPENAI_MODEL, reasoning_effort="high", verbosity="high")
+def _polish_sections(sections, draft_sections):
+    """Rewrites drafted report sections into final report sections."""
+    llm = ChatOpenAI(model=OPENAI_MODEL, reasoning_effort="high", verbosity="high", rate_limiter=BucketRateLimiter(get_limiter("openai")))
     messages = [
-        ("system", f"{FINAL_REPORT_GENERATOR_PROMPT}"),
+        ("system", f"{final_section_prompt(sections)}"),
         ("human", "\n".join([
-            "Generate a final report based on the following draft.",
-            f"Draft Report:\n{draft_report}"
+            "Generate the final report sections based on the following draft.",
+            f"Draft Sections:\n{draft_sections}"
         ]))
     ]
     response = llm.invoke(messages)
-    final_report = response.content
-    logger.info(f"[final_report_generator] Completed final report generating.")
-    return {"final_report": final_report}
+    return response.content
+
+
+def _report_sections(texts):
+    """Returns {title: section} of the report sections found in the given Markdown texts."""
+    sections = {}
+    for text in texts:
+        sections.update(split_sections(text)[1])
+    return sections
+
+
+def section_router(state: ReportState):
+    """Fans the independent section groups out to parallel section writers."""
+    return [Send("section_writer", {**state, "draft_group": name}) for name in DRAFT_SECTION_GROUPS]
+
+
+def section_writer(state: SectionState):
+    """Drafts one group of independent report sections and sends it to its own section polisher."""
+    name = state["draft_group"]
+    group = DRAFT_SECTION_GROUPS[name]
+    logger.info(f"[section_writer] Started writing {name} sections.")
+    draft_sections = _draft_sections(state, group)
+    logger.info(f"[section_writer] Completed writing {name} sections.")
+    return Command(
+        update={"draft_sections": {name: draft_sections}},
+        goto=Send("section_polisher", {"draft_group": name, "draft": draft_sections})
+    )
+
+
+def section_polisher(state: PolishState):
+    """Polishes one drafted group of independent report sections."""
+    name = state["draft_group"]
+    logger.info(f"[section_polisher] Started polishing {name} sections.")
+    final_sections = _polish_sections(DRAFT_SECTION_GROUPS[name]["sections"], state["draft"])
+    logger.info(f"[section_polisher] Completed polishing {name} sections.")
+    return {"final_sections": {name: final_sections}}
+
+
+def summary_writer(state: ReportState):
+    """Drafts and polishes the sections that build on the others while the section groups are polished."""
+    logger.info(f"[summary_writer] Started summary writing.")
+    drafted_sections = "\n\n".join(state["draft_sections"][name] for name in DRAFT_SECTION_GROUPS)
+    draft_summary = _draft_sections(state, DRAFT_SUMMARY_GROUP, drafted_sections)
+    final_summary = _polish_sections(DRAFT_SUMMARY_GROUP["sections"], draft_summary)
+    logger.info(f"[summary_writer] Completed summary writing.")
+    return {"draft_sections": {"summary": draft_summary}, "final_sections": {"summary": final_summary}}
+
+
+def report_assembler(state: ReportState):
+    """Assembles the draft and final reports from the drafted and polished section groups."""
+    logger.info(f"[report_assembler] Started report assembling.")
+    draft_sections = _report_sections(state["draft_sections"].values())
+    final_sections = _report_sections(state["final_sections"].values())
+    missing = [title for title in REPORT_SECTIONS if title not in final_sections]
+    if missing:
+        logger.warning(f"[report_assembler] Final report is missing sections, using their drafts: {missing}")
+    draft_report = "\n\n".join([REPORT_TITLE, *[draft_sections[title] for title in REPORT_SECTIONS if title in draft_sections]])
+    final_report = "\n\n".join([REPORT_TITLE, *[
+        final_sections.get(title, draft_sections.get(title, "")) for title in REPORT_SECTIONS
+    ]])
+    logger.info(f"[report_assembler] Completed report assembling.")
+    return {"draft_report": draft_report, "final_report": final_report}
 
 
 def pdf_converter(state: State):
@@ -1,10 +1,14 @@
+import re
+
+
 DRAFT_REPORT_GENERATOR_PROMPT = """
 # Role and Objective
 Your task is to generate a structured, data-driven draft for the Property Submarket Analysis Report. Your draft will serve as the basis for the final report, guiding the overall direction, analytical focus, and narrative structure.
 
 # Data Usage
-- Use only the provided data tables listed below. Access and analyze them using the provided tool.
+- Use only the provided data tables listed below. Access and analyze them using the provided tools.
 - If a field is missing in a table, treat it as "N/A" and DO NOT attempt to infer or estimate its value.
+- Figures available in `derived_metrics` and `bedroom_segments` are precomputed. Read them directly and DO NOT recompute them.
 - Refer to tables and fields exactly as named (e.g., `sale_listings_stats.medianPricePerSquareFoot`), matching the schema precisely.
 - DO NOT reference or incorporate any information that is not explicitly contained within the provided tables.
 
@@ -12,11 +16,15 @@ Your task is to generate a structured, data-driven draft for the Property Submar
 - `subject_property`: Details of the subject property  
 - `sale_listings`: Sale listings within a 1‑mile radius  
 - `sale_comps`: Comparable sale listings  
+- `sale_top_comps`: Top 5 comparable sale listings, ranked by similarity to the subject property  
 - `sale_listings_stats`: Summary statistics for sale listings  
 - `rental_listings`: Rental listings within a 1‑mile radius  
 - `rental_comps`: Comparable rental listings  
+- `rental_top_comps`: Top 5 comparable rental listings, ranked by similarity to the subject property  
 - `rental_listings_stats`: Summary statistics for rental listings  
 - `demographic_stats`: Demographic and economic summary within a 1‑mile radius
+- `derived_metrics`: Precomputed estimates, shares, rates and investment metrics derived from the tables above
+- `bedroom_segments`: Median price and rent per square foot by bedroom count
 
 ## Table Schemas:
 - `subject_property`:
@@ -35,7 +43,7 @@ Your task is to generate a structured, data-driven draft for the Property Submar
 | ownerNames    | Property Owner - Names       | A list of names of the individuals or organizations listed as the current property owner(s). Individual owner names will typically be in the format First Middle Last |
 | ownerType     | Property Owner - Entity Type | The type of the current property owner(s), with possible values of "Individual" for individuals or persons, or "Organization" for other types of entities             |
 
-- `sale_listings` and `sale_comps`:
+- `sale_listings`, `sale_comps` and `sale_top_comps`:
 | Field              | Description              | Definition                                                                         |
 |:-------------------|:-------------------------|:-----------------------------------------------------------------------------------|
 | addressLine1       | Address Line 1           | The first line of the property street address                                      |
@@ -52,6 +60,7 @@ Your task is to generate a structured, data-driven draft for the Property Submar
 | lastSeenDate       | Date Last Seen           | The date the property listing was most recently seen as active, in ISO 8601 format |
 | daysOnMarket       | Days on Market           | The number of days the property listing has been active                            |
 
+*Note*: `sale_top_comps` has an additional leading `rank` field (1 = most similar to the subject property).
 
 - `sale_listings_stats`:
 | Field                     | Description                  | Definition                                                                                  |
@@ -78,7 +87,7 @@ Your task is to generate a structured, data-driven draft for the Property Submar
 | maxDaysOnMarket           | Maximum Days on Market       | The maximum number of days the sale listing has been active                                 |
 | totalListings             | Number of Total Listings     | The total number of sale listings in the current group                                      |
 
-- `rental_listings` and `rental_comps`:
+- `rental_listings`, `rental_comps` and `rental_top_comps`:
 | Field             | Description              | Definition                                                                         |
 |:------------------|:-------------------------|:-----------------------------------------------------------------------------------|
 | addressLine1      | Address Line 1           | The first line of the property street address                                      |
@@ -95,6 +104,8 @@ Your task is to generate a structured, data-driven draft for the Property Submar
 | lastSeenDate      | Date Last Seen           | The date the property listing was most recently seen as active, in ISO 8601 format |
 | daysOnMarket      | Days on Market           | The number of days the property listing has been active                            |
 
+*Note*: `rental_top_comps` has an additional leading `rank` field (1 = most similar to the subject property).
+
 - `rental_listings_stats`:
 | Field                    | Description                  | Definition                                                                            |
 |:-------------------------|:-----------------------------|:--------------------------------------------------------------------------------------|
@@ -149,6 +160,37 @@ Your task is to generate a structured, data-driven draft for the Property Submar
 | BACHDEG_CY  | Bachelor's Degree                                         | Estimate of the population age 25 years or older who earned a bachelor's degree.                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 |
 | GRADDEG_CY  | Graduate/Professional Degree                              | Estimate of the population age 25 years or older who earned a graduate or professional degree.                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                   |
 
+- `derived_metrics`:
+| Field                     | Description                              | Definition                                                                                                      |
+|:--------------------------|:-----------------------------------------|:----------------------------------------------------------------------------------------------------------------|
+| baselineValue             | Baseline Value ($)                       | `sale_listings_stats.medianPricePerSquareFoot` * `subject_property.squareFootage`                               |
+| compImpliedValue          | Comp-Implied Value ($)                   | Average `sale_top_comps.pricePerSquareFoot` * `subject_property.squareFootage`; empty if there are no comps     |
+| estimatedValue            | Estimated Value ($)                      | `compImpliedValue`, or `baselineValue` if there are no comps                                                    |
+| minEstimatedValue         | Minimum Estimated Value ($)              | `sale_listings_stats.minPricePerSquareFoot` * `subject_property.squareFootage`                                  |
+| maxEstimatedValue         | Maximum Estimated Value ($)              | `sale_listings_stats.maxPricePerSquareFoot` * `subject_property.squareFootage`                                  |
+| baselineRent              | Baseline Rent ($)                        | `rental_listings_stats.medianRentPerSquareFoot` * `subject_property.squareFootage`                              |
+| compImpliedRent           | Comp-Implied Rent ($)                    | Average `rental_top_comps.rentPerSquareFoot` * `subject_property.squareFootage`; empty if there are no comps    |
+| estimatedRent             | Estimated Monthly Rent ($)               | `compImpliedRent`, or `baselineRent` if there are no comps                                                      |
+| minEstimatedRent          | Minimum Estimated Rent ($)               | `rental_listings_stats.minRentPerSquareFoot` * `subject_property.squareFootage`                                 |
+| maxEstimatedRent          | Maximum Estimated Rent ($)               | `rental_listings_stats.maxRentPerSquareFoot` * `subject_property.squareFootage`                                 |
+| saleDaysOnMarket30Share   | Sale Listings Within 30 Days on Market   | Share of sale listings with a known `daysOnMarket` that have been active 30 days or less, as a ratio (0-1)      |
+| rentalDaysOnMarket30Share | Rental Listings Within 30 Days on Market | Share of rental listings with a known `daysOnMarket` that have been active 30 days or less, as a ratio (0-1)    |
+| bachelorDegreeShare       | Bachelor's Degree Share                  | `demographic_stats.BACHDEG_CY` / `demographic_stats.EDUCBASECY`, as a ratio (0-1)                               |
+| graduateDegreeShare       | Graduate or Professional Degree Share    | `demographic_stats.GRADDEG_CY` / `demographic_stats.EDUCBASECY`, as a ratio (0-1)                               |
+| occupancyRate             | Occupancy Rate                           | (`demographic_stats.OWNER_CY` + `demographic_stats.RENTER_CY`) / `demographic_stats.TOTHU_CY`, as a ratio (0-1) |
+| vacancyRate               | Vacancy Rate                             | `demographic_stats.VACANT_CY` / `demographic_stats.TOTHU_CY`, as a ratio (0-1)                                  |
+| grossRentalYield          | Gross Rental Yield                       | (`estimatedRent` * 12) / `estimatedValue`, as a ratio                                                           |
+| grossRentMultiplier       | Gross Rent Multiplier                    | `estimatedValue` / (`estimatedRent` * 12)                                                                       |
+
+- `bedroom_segments`:
+| Field                    | Description               | Definition                                                    |
+|:-------------------------|:--------------------------|:--------------------------------------------------------------|
+| bedrooms                 | Number of Bedrooms        | The bedroom count of the segment                              |
+| medianPricePerSquareFoot | Median Price Per Sq.Ft.   | The median `sale_listings.pricePerSquareFoot` of the segment  |
+| saleListings             | Number of Sale Listings   | The number of sale listings in the segment                    |
+| medianRentPerSquareFoot  | Median Rent Per Sq.Ft.    | The median `rental_listings.rentPerSquareFoot` of the segment |
+| rentalListings           | Number of Rental Listings | The number of rental listings in the segment                  |
+
 # Tool Usage
 
 ## What It Does
@@ -168,36 +210,27 @@ The tool supports multiple output formats for responses, each designed to handle
 ## How to Use It
 - Always specify exact table and field names (including correct spelling and casing) as defined in the provided schema.
 - Each tool call must handle only one type of action (e.g., data filtering, metric computation, chart generation). DO NOT combine multiple actions in a single request.
+- Independent requests (e.g., separate metric lookups for different sections) run concurrently: send them together in one `batch_data_analyzer` call, one action per query, or as parallel `data_analyzer` calls in the same turn. Use sequential calls only when a request depends on an earlier result.
 - For derived metrics, explicitly state the formula and list all required fields with their full path (e.g., `rental_listings_stats.medianRentPerSquareFoot * subject_property.squareFootage`).
 - For chart creation:
     - Clearly specify the chart type and the fields used for each axis (e.g., scatter plot with x = `sale_listings.squareFootage`, y = `sale_listings.pricePerSquareFoot`).
     - Always use the saved path returned by the tool AS-IS. The saved path always start with "exports/charts/". DO NOT modify or reassign it. 
 - DO NOT request operations beyond the capabilities of the tool or the available data (e.g., “Show nearby school ratings and crime stats.”).
 
-## Chart Styles
-For all chart creation requests, you must explicitly specify the style parameters listed below.
-
-### Histogram
-- figsize = (8, 6)
-- dpi = 300
-- color = "skyblue"
-- alpha = 0.6
-- edgecolor = "black"
-- bins = 8
-- grid = False
-- title, xlabel, and ylabel must be provided explicitly. Include appropriate units where applicable (e.g., $, Sq.Ft., %).
-
-### Scatter Plot
-- figsize = (8, 6)
-- dpi = 300
-- color = "skyblue"
-- alpha = 0.6
-- marker = "o"
-- s = 100
-- edgecolors = "black"
-- grid = False
-- title, xlabel, and ylabel must be provided explicitly.  
-- Include appropriate units where applicable (e.g., $, Sq.Ft., %). Include appropriate units where applicable (e.g., $, Sq.Ft., %).
+## SQL Queries
+- Use the `sql_analyzer` tool for lookups, filters, aggregations and group-bys that a single DuckDB SQL query can express (e.g., `SELECT bedrooms, median(pricePerSquareFoot) FROM sale_listings GROUP BY bedrooms`). It answers exactly and instantly.
+- Query the tables and columns by the names in the schemas above.
+- Send independent queries as parallel `sql_analyzer` calls in the same turn. Use sequential calls only when a query depends on an earlier result.
+- Large results are cut to their first rows; aggregate or add a LIMIT instead of selecting whole tables.
+
+## Choosing a Tool
+- Prefer `sql_analyzer` for anything a single SQL query can express.
+- Use the natural-language tools (`data_analyzer`, `batch_data_analyzer`) only for chart creation and for analysis SQL cannot express.
+
+## Report Charts
+The report charts (`sales_hist_path`, `sales_scatter_path`, `rental_hist_path`, `rental_scatter_path`) are already rendered, and their saved paths are listed under "Chart Paths" in the request.
+- DO NOT create these charts with the tool.
+- Always use the listed paths AS-IS. DO NOT modify or reassign them.
 
 # Section-by-Section Guide
 For each section, extract the specified data, metrics, tables and charts as directed in the guide below, and also provide a one-paragraph summarizing the key insights and implications for that section.
@@ -222,7 +255,7 @@ List the following attributes of the subject property.
 ## Sales Market Analysis
 
 ### Sales Market Overview
-Summarize the key metrics of the sales market and create a histogram of sale listings prices.
+Summarize the key metrics of the sales market and present the histogram of sale listings prices.
 - Total Listings: `sale_listings_stats.totalListings`
 - Median Price: `sale_listings_stats.medianPrice`
 - Median Price per Square Foot: `sale_listings_stats.medianPricePerSquareFoot`
@@ -239,18 +272,12 @@ Summarize the key metrics of the sales market and create a histogram of sale lis
 - Median Days on Market: `sale_listings_stats.medianDaysOnMarket`
 - Minimum Days on Market: `sale_listings_stats.minDaysOnMarket`
 - Maximum Days on Market: `sale_listings_stats.maxDaysOnMarket`
-- Histogram of Price: `sale_listings.price` -> {{sales_hist_path}}
+- Histogram of Price: `sale_listings.price` -> `sales_hist_path` from Chart Paths
 
 ### Comparative Market Analysis (CMA)
 Present top 5 comparable sale listings based on similarity to the subject property.
-- Use the `sale_comps` to identify candidate comparable sale listings.
-- For each candidate listing, calculate the absolute differences in the following attributes relative to the subject property: `bedrooms`, `bathrooms`, `squareFootage`, `yearBuilt`
-- Sort all candidate listings in ascending order using the following sequence:
-    - ABS(`sale_comps.bedrooms` - `subject.bedrooms`)
-    - ABS(`sale_comps.bathrooms` - `subject.bathrooms`)
-    - ABS(`sale_comps.squareFootage` - `subject.squareFootage`)
-    - ABS(`sale_comps.yearBuilt` - `subject_property.yearBuilt`)
-- Select the top 5 listings after sorting. If fewer than five listings qualify, return all available matches and clearly note the shortfall.
+- Use the `sale_top_comps`, which already holds the top 5 `sale_comps` sorted in ascending order by the absolute differences from the subject property in `bedrooms`, then `bathrooms`, then `squareFootage`, then `yearBuilt`.
+- DO NOT re-rank or re-select the listings; present them in ascending `rank` order. If it has fewer than five rows, present all of them and clearly note the shortfall.
 - Present the selected listings in a table using the format below:
 | Address | Bedrooms | Bathrooms | Sq.Ft. | Vintage | Price | PPSF |
 |:--------|:---------|:----------|:-------|:--------|:------|:-----|
@@ -270,21 +297,21 @@ Present top 5 comparable sale listings based on similarity to the subject proper
 - PPSF -> `pricePerSquareFoot`
 
 ### Value Estimate
-Estimate the subject property’s value and create a scatter plot of sale listings by price and size.
-- Baseline Value (median sale price per sq.ft × property size): `sale_listings_stats.medianPricePerSquareFoot * subject_property.squareFootage`
-- Comp‑Implied Value (if comps exist): Average price per square foot of selected comps * subject_property.squareFootage`
-- Scatter Plot of Price and Size: x = `sale_listings.squareFootage`, y = `sale_listings.price` -> {{sales_scatter_path}}
+Estimate the subject property’s value and present the scatter plot of sale listings by price and size.
+- Baseline Value (median sale price per sq.ft × property size): `derived_metrics.baselineValue`
+- Comp‑Implied Value (if comps exist): `derived_metrics.compImpliedValue`
+- Scatter Plot of Price and Size: x = `sale_listings.squareFootage`, y = `sale_listings.price` -> `sales_scatter_path` from Chart Paths
 
 ### Valuation Sensitivity
 Provide a range of estimated property values based on minimum and maximum price per square foot.
-- Estimated Value (Baseline Value or Comp‑Implied Value)
-- Minimum Estimated Value (minimum sale price per sq.ft × property size): `sale_listings_stats.minPricePerSquareFoot * subject_property.squareFootage`
-- Maximum Estimated Value (maximum sale price per sq.ft × property size): `sale_listings_stats.maxPricePerSquareFoot * subject_property.squareFootage`
+- Estimated Value (Baseline Value or Comp‑Implied Value): `derived_metrics.estimatedValue`
+- Minimum Estimated Value (minimum sale price per sq.ft × property size): `derived_metrics.minEstimatedValue`
+- Maximum Estimated Value (maximum sale price per sq.ft × property size): `derived_metrics.maxEstimatedValue`
 
 ## Rental Market Analysis
 
 ### Rental Market Overview
-Summarize the key metrics of the rental market and create a histogram of rental listing rents.
+Summarize the key metrics of the rental market and present the histogram of rental listing rents.
 - Total Listings: `rental_listings_stats.totalListings`
 - Median Rent: `rental_listings_stats.medianRent`
 - Median Rent per Square Foot: `rental_listings_stats.medianRentPerSquareFoot`
@@ -301,18 +328,12 @@ Summarize the key metrics of the rental market and create a histogram of rental
 - Median Days on Market: `rental_listings_stats.medianDaysOnMarket`
 - Minimum Days on Market: `rental_listings_stats.minDaysOnMarket`
 - Maximum Days on Market: `rental_listings_stats.maxDaysOnMarket`
-- Histogram of Rent: `rental_listings.rent` -> {{rental_hist_path}}
+- Histogram of Rent: `rental_listings.rent` -> `rental_hist_path` from Chart Paths
 
 ### Comparative Market Analysis (CMA)
 Present top 5 comparable rental listings based on similarity to the subject property.
-- Use the `rental_comps` to identify candidate comparable rental listings.
-- For each candidate listing, calculate the absolute differences in the following attributes relative to the subject property: `bedrooms`, `bathrooms`, `squareFootage`, `yearBuilt`
-- Sort all candidate listings in ascending order using the following sequence:
-    - ABS(`rental_comps.bedrooms` - `subject.bedrooms`)
-    - ABS(`rental_comps.bathrooms` - `subject.bathrooms`)
-    - ABS(`rental_comps.squareFootage` - `subject.squareFootage`)
-    - ABS(`rental_comps.yearBuilt` - `subject_property.yearBuilt`)
-- Select the top 5 listings after sorting. If fewer than five listings qualify, return all available matches and clearly note the shortfall.
+- Use the `rental_top_comps`, which already holds the top 5 `rental_comps` sorted in ascending order by the absolute differences from the subject property in `bedrooms`, then `bathrooms`, then `squareFootage`, then `yearBuilt`.
+- DO NOT re-rank or re-select the listings; present them in ascending `rank` order. If it has fewer than five rows, present all of them and clearly note the shortfall.
 - Present the selected listings in a table using the format below:
 | Address | Bedrooms | Bathrooms | Sq.Ft. | Vintage | Rent | RPSF |
 |:--------|:---------|:----------|:-------|:--------|:-----|:-----|
@@ -332,15 +353,15 @@ Present top 5 comparable rental listings based on similarity to the subject prop
 - RPSF -> `rentPerSquareFoot`
 
 ### Rent Estimate
-Estimate the subject property’s rent and create a scatter plot of rental listings by rent and size.
-- Baseline Rent (median rent per sq.ft × property size): `rental_listings_stats.medianRentPerSquareFoot` * `subject_property.squareFootage`
-- Comp‑Implied Rent (average rent per sq.ft of selected comps × property size): Average rent per square foot of selected comps  * `subject_property.squareFootage`
-- Scatter Plot of Rent and Size: x = `rental_listings.squareFootage`, y = `rental_listings.rent` -> {{rental_scatter_path}}
+Estimate the subject property’s rent and present the scatter plot of rental listings by rent and size.
+- Baseline Rent (median rent per sq.ft × property size): `derived_metrics.baselineRent`
+- Comp‑Implied Rent (average rent per sq.ft of selected comps × property size): `derived_metrics.compImpliedRent`
+- Scatter Plot of Rent and Size: x = `rental_listings.squareFootage`, y = `rental_listings.rent` -> `rental_scatter_path` from Chart Paths
 
 ### Rental Sensitivity
 Provide a range of estimated property rents based on minimum and maximum rent per square foot.
-- Minimum Estimated Rent (minimum rent per sq.ft × property size): `rental_listings_stats.minRentPerSquareFoot` * `subject_property.squareFootage`
-- Maximum Estimated Rent (maximum rent per sq.ft × property size): `rental_listings_stats.maxRentPerSquareFoot` * `subject_property.squareFootage`
+- Minimum Estimated Rent (minimum rent per sq.ft × property size): `derived_metrics.minEstimatedRent`
+- Maximum Estimated Rent (maximum rent per sq.ft × property size): `derived_metrics.maxEstimatedRent`
 
 ## Market Dynamics and Segmentation
 
@@ -354,12 +375,13 @@ Analyze how quickly properties are being rented or sold based on days on market.
 - Median Days on Market (Rent): `rental_listings_stats.medianDaysOnMarket`
 - Minimum Days on Market (Rent): `rental_listings_stats.minDaysOnMarket`
 - Maximum Days on Market (Rent): `rental_listings_stats.maxDaysOnMarket`
-- Derived metric: share of `sale_listings.daysOnMarket` <= 30 and `rental_listings.daysOnMarket` <= 30
+- Share of Sale Listings Within 30 Days on Market: `derived_metrics.saleDaysOnMarket30Share`
+- Share of Rental Listings Within 30 Days on Market: `derived_metrics.rentalDaysOnMarket30Share`
 
 ### Market Segmentation
 Compare price and rent per square foot across bedroom types and relate to the subject property.
-- Median Price per Square Foot by Bedrooms: compute median `sale_listings.pricePerSquareFoot` grouped by `sale_listings.bedrooms`
-- Median Rent per Square Foot by Bedrooms: compute median `rental_listings.rentPerSquareFoot` grouped by `rental_listings.bedrooms`
+- Median Price per Square Foot by Bedrooms: `bedroom_segments.medianPricePerSquareFoot` by `bedroom_segments.bedrooms`
+- Median Rent per Square Foot by Bedrooms: `bedroom_segments.medianRentPerSquareFoot` by `bedroom_segments.bedrooms`
 - Compare the subject property’s bedroom count and living area to these segment medians.
 
 ## Demographic and Economic Analysis
@@ -379,20 +401,20 @@ Highlight key economic indicators including income, education, and unemployment.
 - Per Capita Income: `demographic_stats.PCI_CY`
 - Future Income Growth Rate (2025–2030): `demographic_stats.MHIGRWCYFY`
 - Unemployment Rate: `demographic_stats.UNEMPRT_CY`
-- Bachelor’s Degree Share: `demographic_stats.BACHDEG_CY` / `demographic_stats.EDUCBASECY`
-- Graduate or Professional Degree Share: `demographic_stats.GRADDEG_CY` / `demographic_stats.EDUCBASECY`
+- Bachelor’s Degree Share: `derived_metrics.bachelorDegreeShare`
+- Graduate or Professional Degree Share: `derived_metrics.graduateDegreeShare`
 
 ### Housing Occupancy
 Analyze current occupancy and vacancy rates in the housing market.
-- Occupancy Rate: (`demographic_stats.OWNER_CY` + `demographic_stats.RENTER_CY`) / `demographic_stats.TOTHU_CY`
-- Vacancy Rate: `demographic_stats.VACANT_CY` / `demographic_stats.TOTHU_CY`
+- Occupancy Rate: `derived_metrics.occupancyRate`
+- Vacancy Rate: `derived_metrics.vacancyRate`
 
 ## Investment Analysis
 Evaluate investment potential using gross rental yield and rent multiplier metrics. Use the estimates from the ### Value Estimate and ### Rent Estimate sections.
-- Estimated Value: comp-implied value from ### Value Estimate
-- Estimated Monthly Rent: comp-implied rent from ### Rent Estimate 
-- Gross Rental Yield (annual estimated rent ÷ estimated value): (estimated monthly rent * 12) / estimated value
-- Gross Rent Multiplier (estimated value ÷ estimated annual rent): estimated value / (estimated monthly rent * 12)
+- Estimated Value: `derived_metrics.estimatedValue`
+- Estimated Monthly Rent: `derived_metrics.estimatedRent`
+- Gross Rental Yield (annual estimated rent ÷ estimated value): `derived_metrics.grossRentalYield`
+- Gross Rent Multiplier (estimated value ÷ estimated annual rent): `derived_metrics.grossRentMultiplier`
 
 ## SWOT Analysis
 Present a SWOT table with 3 short, data-backed items using the format below:
@@ -404,7 +426,7 @@ Present a SWOT table with 3 short, data-backed items using the format below:
 Summarize key findings and provide an investment recommendation based on the analysis.
 
 # Output Format
-Return the output in the Markdown format below. Replace all table and chart placeholders with the corresponding table content or the returned chart image file path. DO NOT add any sections, headings, disclaimers, or commentary that are not explicitly included in the format.
+Return the output in the Markdown format below. Replace all table and chart placeholders with the corresponding table content or the chart image file path from Chart Paths. DO NOT add any sections, headings, disclaimers, or commentary that are not explicitly included in the format.
 
 # Property Submarket Analysis Report
 ## Executive Summary
@@ -672,4 +694,123 @@ Return the output in the Markdown format below. For all table and chart placehol
 
 ## Conclusion and Recommendation
 {{paragraph}}
-""".strip()
\ No newline at end of file
+""".strip()
+
+
+# Independent groups of draft sections, each drafted by its own agent over the listed tables and charts.
+DRAFT_SECTION_GROUPS = {
+    "subject_property": {
+        "sections": ["Subject Property Overview"],
+        "tables": ["subject_property"],
+        "charts": []
+    },
+    "sales_market": {
+        "sections": ["Sales Market Analysis"],
+        "tables": ["subject_property", "sale_listings", "sale_comps", "sale_top_comps", "sale_listings_stats", "derived_metrics"],
+        "charts": ["sales_hist_path", "sales_scatter_path"]
+    },
+    "rental_market": {
+        "sections": ["Rental Market Analysis"],
+        "tables": ["subject_property", "rental_listings", "rental_comps", "rental_top_comps", "rental_listings_stats", "derived_metrics"],
+        "charts": ["rental_hist_path", "rental_scatter_path"]
+    },
+    "market_dynamics": {
+        "sections": ["Market Dynamics and Segmentation"],
+        "tables": ["subject_property", "sale_listings", "sale_listings_stats", "rental_listings", "rental_listings_stats", "derived_metrics", "bedroom_segments"],
+        "charts": []
+    },
+    "demographics": {
+        "sections": ["Demographic and Economic Analysis"],
+        "tables": ["demographic_stats", "derived_metrics"],
+        "charts": []
+    }
+}
+
+# Sections that build on the others; drafted last, with the drafted groups above in the request.
+DRAFT_SUMMARY_GROUP = {
+    "sections": ["Executive Summary", "Investment Analysis", "SWOT Analysis", "Conclusion and Recommendation"],
+    "tables": ["subject_property", "derived_metrics"],
+    "charts": []
+}
+
+REPORT_TITLE = "# Property Submarket Analysis Report"
+
+
+def split_sections(text, heading="## "):
+    """Splits Markdown at lines starting with `heading` into the text before the first one and {title: block}."""
+    parts = re.split(rf"^(?={re.escape(heading)})", text, flags=re.M)
+    blocks = {}
+    for part in parts[1:]:
+        title = part.split("\n", 1)[0][len(heading):].strip()
+        blocks[title] = part.strip()
+    return parts[0].strip(), blocks
+
+
+_, _DRAFT_PARTS = split_sections(DRAFT_REPORT_GENERATOR_PROMPT, "# ")
+_DATA_USAGE, _DATA_PARTS = split_sections(_DRAFT_PARTS["Data Usage"])
+_, _TABLE_SCHEMAS = split_sections(_DATA_PARTS["Table Schemas:"], "- `")
+_GUIDE, _GUIDE_SECTIONS = split_sections(_DRAFT_PARTS["Section-by-Section Guide"])
+_, _FORMAT_SECTIONS = split_sections(_DRAFT_PARTS["Property Submarket Analysis Report"])
+REPORT_SECTIONS = list(_FORMAT_SECTIONS)
+_TOOL_USAGE, _TOOL_USAGE_PARTS = split_sections(_DRAFT_PARTS["Tool Usage"])
+
+# Tool usage subsections that describe the tools of each analyzer backend.
+TOOL_USAGE_SECTIONS = {
+    "pandasai": ["What It Does", "What It Returns", "How to Use It", "Report Charts"],
+    "duckdb": ["SQL Queries", "Report Charts"],
+    "hybrid": ["What It Does", "What It Returns", "How to Use It", "SQL Queries", "Choosing a Tool", "Report Charts"]
+}
+
+
+def draft_section_prompt(sections, tables, backend):
+    """Returns the draft prompt narrowed to the given report sections and data tables and the tools of an analyzer backend."""
+    table_lines = [
+        line for line in _DATA_PARTS["Data Tables"].splitlines()[1:]
+        if line.startswith("- `") and line.split("`")[1] in tables
+    ]
+    schemas = [
+        block for title, block in _TABLE_SCHEMAS.items()
+        if set(re.findall(r"(\w+)`", title)) & set(tables)
+    ]
+    return "\n\n".join([
+        "\n".join([
+            "# Role and Objective",
+            f"Your task is to generate the following sections of a structured, data-driven draft for the Property Submarket Analysis Report: {', '.join(sections)}. "
+            "The other sections are drafted separately; when drafted sections are included in the request, build on them and keep their figures unchanged. "
+            "Your draft will serve as the basis for the final report, guiding the overall direction, analytical focus, and narrative structure."
+        ]),
+        _DATA_USAGE,
+        "\n".join(["## Data Tables", *table_lines]),
+        "\n".join(["## Table Schemas:", *schemas]),
+        "\n\n".join(["# Tool Usage", *[_TOOL_USAGE_PARTS[title] for title in TOOL_USAGE_SECTIONS[backend]]]),
+        "\n\n".join([_GUIDE, *[_GUIDE_SECTIONS[section] for section in sections]]),
+        "\n\n".join([
+            _DRAFT_PARTS["Output Format"],
+            *[_FORMAT_SECTIONS[section] for section in sections]
+        ])
+    ])
+
+
+_, _FINAL_PARTS = split_sections(FINAL_REPORT_GENERATOR_PROMPT, "# ")
+_FINAL_GUIDE, _FINAL_GUIDE_SECTIONS = split_sections(_FINAL_PARTS["Section-by-Section Guide"])
+_, _FINAL_FORMAT_SECTIONS = split_sections(_FINAL_PARTS["Property Submarket Analysis Report"])
+
+
+def final_section_prompt(sections):
+    """Returns the final report prompt narrowed to the given report sections."""
+    return "\n\n".join([
+        "\n".join([
+            "# Role and Objective",
+            f"You will be provided with the following sections of a draft of the Property Submarket Analysis Report: {', '.join(sections)}. "
+            "Each section includes data points and tables, calculated metrics, charts, and concise summaries. "
+            "Your task is to transform these sections into well-structured, fluently written report sections that clearly present the property and its market context. "
+            "The other sections are written separately and assembled with yours in report order."
+        ]),
+        _FINAL_PARTS["Data Usage"],
+        _FINAL_PARTS["Writing Style & Flow"],
+        "\n\n".join([_FINAL_GUIDE, *[_FINAL_GUIDE_SECTIONS[section] for section in sections]]),
+        "\n\n".join([
+            _FINAL_PARTS["Output Format"],
+            *[_FINAL_FORMAT_SECTIONS[section] for section in sections]
+        ])
+    ])
@@ -0,0 +1,146 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from config import (
+    RENTCAST_URL,
+    ARCGIS_URL,
+    ARCGIS_ENRICH_URL,
+    RATE_LIMITS,
+    BACKOFF_BASE,
+    BACKOFF_MAX
+)
+
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    Token-bucket limiter shared by threads and asyncio tasks.
+
+    Callers reserve a slot under a lock and then sleep outside it, so waiting callers are released in order
+    at the configured rate instead of all retrying at once. A `Retry-After` from the provider pauses the
+    whole bucket until the given time.
+    """
+
+    def __init__(self, name, rate, capacity):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._history = deque()
+        self._throttled = 0
+
+    def _reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            delay = max(-self._tokens / self.rate, self._blocked_until - now, 0.0)
+            self._history.append(now + delay)
+            if delay > 0:
+                self._throttled += 1
+            return delay
+
+    def acquire(self):
+        """Blocks the calling thread until a request slot is available."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self):
+        """Waits on the event loop until a request slot is available."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        """Holds every caller of this bucket for `seconds`, e.g. from a `Retry-After` header."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        logger.warning(f"[TokenBucket] Paused {self.name} requests for {seconds:.1f}s.")
+
+    def usage(self):
+        """Returns the current quota usage of this bucket."""
+        with self._lock:
+            now = time.monotonic()
+            while self._history and self._history[0] < now - 60:
+                self._history.popleft()
+            available = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "available": round(available, 2),
+                "requestsLastMinute": len(self._history),
+                "throttled": self._throttled,
+                "pausedFor": round(max(self._blocked_until - now, 0.0), 2)
+            }
+
+
+class BucketRateLimiter(BaseRateLimiter):
+    """Adapts a `TokenBucket` to LangChain chat models' `rate_limiter` parameter."""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def acquire(self, *, blocking=True):
+        self.bucket.acquire()
+        return True
+
+    async def aacquire(self, *, blocking=True):
+        await self.bucket.aacquire()
+        return True
+
+
+limiters = {provider: TokenBucket(provider, rate, capacity) for provider, (rate, capacity) in RATE_LIMITS.items()}
+
+
+def get_limiter(provider):
+    return limiters[provider]
+
+
+def provider_for_url(url):
+    """Returns the rate-limited provider a URL belongs to, or None."""
+    if url.startswith(RENTCAST_URL):
+        return "rentcast"
+    if url.startswith(ARCGIS_URL) or url.startswith(ARCGIS_ENRICH_URL):
+        return "arcgis"
+    return None
+
+
+def quota_usage():
+    """Returns the current quota usage of every provider."""
+    return {provider: limiter.usage() for provider, limiter in limiters.items()}
+
+
+def retry_after_seconds(value):
+    """Parses a `Retry-After` header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Returns the wait before retry `attempt` (0-based): `Retry-After` if given, else capped exponential backoff with full jitter."""
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import random
+import logging
+import argparse
+from urllib.parse import urlsplit, parse_qsl, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from src.cache import make_key
+from config import RECORD_DIR, FIXTURES_DIR, ARCGIS_TOKEN_EXPIRATION
+
+
+logger = logging.getLogger(__name__)
+
+CREDENTIAL_PARAMS = ("token", "username", "password", "referer", "expiration")
+# Stands in for the live token, which is never written to a fixture.
+REPLAY_TOKEN = "replay-token"
+
+
+def fixture_key(provider, method, path, params):
+    """Builds the fixture key shared by the recorder and the replay server; credentials are not part of it."""
+    params = {k: v for k, v in (params or {}).items() if k not in CREDENTIAL_PARAMS}
+    return make_key(f"replay/{provider}", method.upper(), path, params)
+
+
+def _request_params(request):
+    if request.method == "POST":
+        return dict(parse_qsl(request.content.decode()))
+    return dict(request.url.params)
+
+
+def _redact(body):
+    if isinstance(body, dict) and "token" in body:
+        return {**body, "token": REPLAY_TOKEN}
+    return body
+
+
+def record(provider, response):
+    """
+    Saves a live httpx response as a fixture in `RECORD_DIR`, keyed by the request as it went on the wire.
+    Credentials are left out of the key and a token in the body is replaced with `REPLAY_TOKEN`.
+    """
+    request = response.request
+    params = {k: v for k, v in _request_params(request).items() if k not in CREDENTIAL_PARAMS}
+    key = fixture_key(provider, request.method, request.url.path, params)
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    with open(f"{RECORD_DIR}/{key}.json", "w") as f:
+        json.dump({
+            "provider": provider,
+            "method": request.method,
+            "path": request.url.path,
+            "params": params,
+            "status": response.status_code,
+            "body": _redact(response.json())
+        }, f)
+
+
+def load_fixtures(fixtures_dir):
+    fixtures = {}
+    for name in os.listdir(fixtures_dir):
+        if name.endswith(".json"):
+            with open(f"{fixtures_dir}/{name}", "r") as f:
+                fixtures[name[:-len(".json")]] = json.load(f)
+    return fixtures
+
+
+def _fresh_token(body, params):
+    """
+    Serves a recorded token as `REPLAY_TOKEN` with its absolute `expires` moved to the requested lifetime
+    from now, as a live `generateToken` would.
+    """
+    if not isinstance(body, dict) or "token" not in body:
+        return body
+    lifetime = float(params.get("expiration") or ARCGIS_TOKEN_EXPIRATION // 60) * 60
+    return {**body, "token": REPLAY_TOKEN, "expires": int((time.time() + lifetime) * 1000)}
+
+
+def build_handler(fixtures, latency, jitter, error_rate, error_status):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        """
+        Serves recorded fixtures for `/<provider>/<live path>` requests.
+
+        Token fixtures are served with a fresh `expires`. Each response is delayed by `latency` ± `jitter`
+        seconds, and a fraction `error_rate` of requests fails with `error_status` and a one-second `Retry-After`.
+        """
+
+        def _respond(self, status, body, headers=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _handle(self, method, params):
+            time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+            if random.random() < error_rate:
+                self._respond(error_status, {"error": "Injected error."}, {"Retry-After": "1"})
+                return
+            url = urlsplit(self.path)
+            provider, _, path = unquote(url.path).lstrip("/").partition("/")
+            fixture = fixtures.get(fixture_key(provider, method, f"/{path}", params))
+            if fixture is None:
+                self._respond(404, {"error": f"No fixture for {method} {url.path}."})
+                return
+            self._respond(fixture["status"], _fresh_token(fixture["body"], params))
+
+        def do_GET(self):
+            self._handle("GET", dict(parse_qsl(urlsplit(self.path).query)))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self._handle("POST", dict(parse_qsl(self.rfile.read(length).decode())))
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return ReplayHandler
+
+
+def serve(host, port, fixtures_dir, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503):
+    """Runs the replay server until interrupted."""
+    fixtures = load_fixtures(fixtures_dir)
+    server = ThreadingHTTPServer((host, port), build_handler(fixtures, latency, jitter, error_rate, error_status))
+    logger.info(f"[serve] Replaying {len(fixtures)} fixtures on http://{host}:{port}.")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    parser = argparse.ArgumentParser(description="Replay recorded RentCast and ArcGIS responses.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean response delay in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum deviation from the mean delay in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status.")
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.fixtures_dir, args.latency, args.jitter, args.error_rate, args.error_status)
@@ -0,0 +1,79 @@
+import pandas as pd
+
+
+STRING = "string[pyarrow]"
+DATETIME = "datetime64[ns, UTC]"
+
+# Counts, areas and years are whole or half numbers, which float32 holds exactly; prices, fees and
+# derived per-square-foot values stay float64 so the reported figures are not perturbed.
+SUBJECT_PROPERTY_DTYPES = {
+    "addressLine1": STRING,
+    "addressLine2": STRING,
+    "bedrooms": "float32",
+    "bathrooms": "float32",
+    "squareFootage": "float32",
+    "lotSize": "float32",
+    "yearBuilt": "float32",
+    "hoaFee": "float64",
+    "lastSaleDate": DATETIME,
+    "lastSalePrice": "float64",
+    "ownerType": "category"
+}
+
+
+def listing_dtypes(spec):
+    """Returns the declared dtypes of a listing table for a spec (see `src.analytics.LISTING_SPECS`)."""
+    value = spec["value"]
+    return {
+        "addressLine1": STRING,
+        "addressLine2": "category",
+        "bedrooms": "float32",
+        "bathrooms": "float32",
+        "squareFootage": "float32",
+        "lotSize": "float32",
+        "yearBuilt": "float32",
+        "hoaFee": "float64",
+        value: "float64",
+        f"{value}PerSquareFoot": "float64",
+        "listedDate": DATETIME,
+        "lastSeenDate": DATETIME,
+        "daysOnMarket": "float32"
+    }
+
+
+def demographic_dtypes(columns):
+    """Returns the declared dtypes of the demographic table; ArcGIS rates and dollar figures stay float64."""
+    return dict.fromkeys(columns, "float64")
+
+
+def apply_schema(frame, dtypes):
+    """Casts the declared columns of a frame; dates are parsed as UTC and unparseable ones become NaT."""
+    columns = {}
+    for column, dtype in dtypes.items():
+        if column not in frame:
+            continue
+        if dtype == DATETIME:
+            columns[column] = pd.to_datetime(frame[column], utc=True, errors="coerce")
+        else:
+            columns[column] = frame[column].astype(dtype)
+    return frame.assign(**columns)
+
+
+def memory_usage(frame):
+    """Returns the deep memory usage of a frame in bytes, including its index and string payloads."""
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def memory_report(tables):
+    """Returns bytes per table before and after compaction from {name: (before, after)} frames."""
+    rows = []
+    for name, (before, after) in tables.items():
+        before_bytes, after_bytes = memory_usage(before), memory_usage(after)
+        rows.append({
+            "table": name,
+            "rows": len(after),
+            "bytesBefore": before_bytes,
+            "bytesAfter": after_bytes,
+            "ratio": round(before_bytes / after_bytes, 2) if after_bytes else None
+        })
+    return pd.DataFrame(rows)
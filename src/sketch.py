@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with a relative error bound that also supports deletion.
+
+    A positive value x is counted in bucket ceil(log_gamma(x)) with gamma = (1 + a) / (1 - a), and every
+    bucket is reported by a value within a relative error `a` of all values it holds; negative values use
+    mirrored buckets and zeros a separate count. Buckets are plain counts, so removing a value that was
+    added is exact and two sketches merge by adding their counts.
+    """
+
+    def __init__(self, relative_accuracy, bins=None, negative_bins=None, zero_count=0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = dict(bins or {})
+        self.negative_bins = dict(negative_bins or {})
+        self.zero_count = zero_count
+
+    @property
+    def count(self):
+        return sum(self.bins.values()) + sum(self.negative_bins.values()) + self.zero_count
+
+    def _update_bins(self, bins, values, weight):
+        if not len(values):
+            return
+        indexes, counts = np.unique(np.ceil(np.log(values) / self._log_gamma).astype(np.int64), return_counts=True)
+        for index, count in zip(indexes.tolist(), counts.tolist()):
+            count = bins.get(index, 0) + weight * count
+            if count:
+                bins[index] = count
+            else:
+                bins.pop(index, None)
+
+    def update(self, values, weight=1):
+        """Adds (weight 1) or removes (weight -1) an array of values; NaN is ignored."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self._update_bins(self.bins, values[values > 0], weight)
+        self._update_bins(self.negative_bins, -values[values < 0], weight)
+        self.zero_count += weight * int(np.count_nonzero(values == 0))
+
+    def merge(self, other):
+        """Adds the counts of a sketch with the same relative accuracy."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracies.")
+        for bins, other_bins in ((self.bins, other.bins), (self.negative_bins, other.negative_bins)):
+            for index, count in other_bins.items():
+                bins[index] = bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+
+    def _bucket_value(self, index):
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def value_at_rank(self, rank):
+        """Returns the estimated value of the 0-based `rank`-th smallest value."""
+        cumulative = 0
+        for index in sorted(self.negative_bins, reverse=True):
+            cumulative += self.negative_bins[index]
+            if cumulative > rank:
+                return -self._bucket_value(index)
+        cumulative += self.zero_count
+        if cumulative > rank:
+            return 0.0
+        for index in sorted(self.bins):
+            cumulative += self.bins[index]
+            if cumulative > rank:
+                return self._bucket_value(index)
+        return np.nan
+
+    def quantile(self, q):
+        """Returns the estimated q-quantile (lower rank), or NaN for an empty sketch."""
+        count = self.count
+        if not count:
+            return np.nan
+        return self.value_at_rank(int(q * (count - 1)))
+
+    def median(self):
+        """Returns the estimated median, averaging the two middle ranks of an even count like pandas."""
+        count = self.count
+        if not count:
+            return np.nan
+        return (self.value_at_rank((count - 1) // 2) + self.value_at_rank(count // 2)) / 2
+
+    def to_dict(self):
+        return {
+            "relativeAccuracy": self.relative_accuracy,
+            "bins": {str(index): count for index, count in self.bins.items()},
+            "negativeBins": {str(index): count for index, count in self.negative_bins.items()},
+            "zeroCount": self.zero_count
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["relativeAccuracy"],
+            {int(index): count for index, count in data["bins"].items()},
+            {int(index): count for index, count in data["negativeBins"].items()},
+            data["zeroCount"]
+        )
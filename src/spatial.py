@@ -0,0 +1,180 @@
+import os
+import json
+import math
+import time
+import sqlite3
+import logging
+import threading
+
+import numpy as np
+
+from src.cache import response_cache
+from config import (
+    SPATIAL_INDEX_PATH,
+    SPATIAL_INDEX_TTL,
+    GEOHASH_PRECISION
+)
+
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_MILES = 3958.8
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude, longitude, precision):
+    """Encodes a coordinate as a geohash string of `precision` characters."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            bits = (bits << 1) | (longitude >= mid)
+            lon_range[longitude < mid] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            bits = (bits << 1) | (latitude >= mid)
+            lat_range[latitude < mid] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def _geohash_cell_size(precision):
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def geohash_cover(latitude, longitude, radius, precision):
+    """Returns the geohash cells of `precision` that cover the bounding box of a radius (miles) around a point."""
+    lat_delta = math.degrees(radius / EARTH_RADIUS_MILES)
+    lon_delta = lat_delta / max(math.cos(math.radians(latitude)), 1e-6)
+    cell_lat, cell_lon = _geohash_cell_size(precision)
+    cells = set()
+    for lat in np.arange(latitude - lat_delta, latitude + lat_delta + cell_lat, cell_lat):
+        for lon in np.arange(longitude - lon_delta, longitude + lon_delta + cell_lon, cell_lon):
+            cells.add(geohash_encode(min(lat, latitude + lat_delta), min(lon, longitude + lon_delta), precision))
+    return sorted(cells)
+
+
+def haversine(latitude, longitude, latitudes, longitudes):
+    """Returns great-circle distances in miles from a point to arrays of coordinates."""
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+class ListingsIndex:
+    """
+    Local spatial store of collected RentCast listings, indexed by geohash.
+
+    Every API fetch is recorded as a coverage disc (center, radius, property type, fetch time) alongside the
+    listings it returned. A radius query is answered locally when a fresh disc contains it; only listings
+    seen at or after that disc's fetch are returned, so delisted properties drop out with the next refetch.
+    The index follows the response cache mode: it is bypassed when off and not written when read-only.
+    """
+
+    def __init__(self, path, ttl, precision):
+        self.path = path
+        self.ttl = ttl
+        self.precision = precision
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS listings (
+                    kind TEXT NOT NULL,
+                    property_type TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    geohash TEXT NOT NULL,
+                    latitude REAL NOT NULL,
+                    longitude REAL NOT NULL,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (kind, property_type, id)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS listings_geohash ON listings (kind, property_type, geohash)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    kind TEXT NOT NULL,
+                    property_type TEXT NOT NULL,
+                    latitude REAL NOT NULL,
+                    longitude REAL NOT NULL,
+                    radius REAL NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def query(self, kind, property_type, latitude, longitude, radius):
+        """Returns cached listings within `radius` miles, or None when no fresh disc covers the query."""
+        if not response_cache.readable or latitude is None or longitude is None:
+            return None
+        with self._lock:
+            conn = self._connect()
+            discs = conn.execute(
+                "SELECT latitude, longitude, radius, fetched_at FROM coverage WHERE kind = ? AND property_type = ? AND fetched_at > ?",
+                (kind, property_type, time.time() - self.ttl)
+            ).fetchall()
+            if not discs:
+                return None
+            discs = np.array(discs)
+            offsets = haversine(latitude, longitude, discs[:, 0], discs[:, 1])
+            covering = discs[offsets + radius <= discs[:, 2]]
+            if not len(covering):
+                return None
+            fetched_at = covering[:, 3].max()
+            cells = geohash_cover(latitude, longitude, radius, self.precision)
+            prefixes = " OR ".join(["(geohash >= ? AND geohash < ?)"] * len(cells))
+            rows = conn.execute(
+                f"SELECT latitude, longitude, payload FROM listings WHERE kind = ? AND property_type = ? AND fetched_at >= ? AND ({prefixes})",
+                (kind, property_type, fetched_at, *[bound for cell in cells for bound in (cell, cell + "{")])
+            ).fetchall()
+        if not rows:
+            return []
+        coordinates = np.array([row[:2] for row in rows])
+        within = haversine(latitude, longitude, coordinates[:, 0], coordinates[:, 1]) <= radius
+        return [json.loads(row[2]) for row, keep in zip(rows, within) if keep]
+
+    def add_listings(self, kind, property_type, listings, fetched_at):
+        """Upserts a page of fetched listings; call `add_coverage` once the whole disc has been fetched."""
+        if not response_cache.writable:
+            return
+        rows = [
+            (kind, property_type, str(listing["id"]), geohash_encode(listing["latitude"], listing["longitude"], 12),
+             listing["latitude"], listing["longitude"], json.dumps(listing), fetched_at)
+            for listing in listings
+            if listing.get("id") is not None and listing.get("latitude") is not None and listing.get("longitude") is not None
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+
+    def add_coverage(self, kind, property_type, latitude, longitude, radius, fetched_at):
+        """Records a completely fetched disc, making its listings servable, and drops expired data."""
+        if not response_cache.writable or latitude is None or longitude is None:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?)", (kind, property_type, latitude, longitude, radius, fetched_at))
+            conn.execute("DELETE FROM coverage WHERE fetched_at <= ?", (fetched_at - self.ttl,))
+            conn.execute("DELETE FROM listings WHERE fetched_at <= ?", (fetched_at - self.ttl,))
+            conn.commit()
+        logger.info(f"[ListingsIndex] Recorded a {radius}-mile {kind} disc.")
+
+
+listings_index = ListingsIndex(SPATIAL_INDEX_PATH, SPATIAL_INDEX_TTL, GEOHASH_PRECISION)
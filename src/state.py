@@ -1,31 +1,56 @@
-from typing import TypedDict 
+from typing import TypedDict, Annotated
 
+import pandas as pd
 from pydantic import BaseModel
-from langgraph.prebuilt.chat_agent_executor import AgentState
 
+from src.columnar import ColumnBuffer
 
+
+# Collectors write raw RentCast/ArcGIS records or column buffers; processors replace them with DataFrames,
+# which are passed by reference through the graph and wrapped once per run by the analyzer session.
 class State(TypedDict):
     address: str
     property_type: str
-    subject_property: list[dict]
-    sale_listings: list[dict]
-    sale_comps: list[dict]
-    sale_listings_stats: list[dict]
-    rental_listings: list[dict]
-    rental_comps: list[dict]
-    rental_listings_stats: list[dict]
-    demographic_stats: list[dict]
+    subject_property: list[dict] | pd.DataFrame
+    sale_listings: ColumnBuffer | pd.DataFrame
+    sale_comps: pd.DataFrame
+    sale_top_comps: pd.DataFrame
+    sale_listings_stats: pd.DataFrame
+    rental_listings: ColumnBuffer | pd.DataFrame
+    rental_comps: pd.DataFrame
+    rental_top_comps: pd.DataFrame
+    rental_listings_stats: pd.DataFrame
+    demographic_stats: list[dict] | pd.DataFrame
+    derived_metrics: pd.DataFrame
+    bedroom_segments: pd.DataFrame
+    chart_paths: dict[str, str]
     draft_report: str
     final_report: str
     output_path: str
 
 
-class AnalyzerState(AgentState):
-    subject_property: list[dict]
-    sale_listings: list[dict]
-    sale_comps: list[dict]
-    sale_listings_stats: list[dict]
-    rental_listings: list[dict]
-    rental_comps: list[dict]
-    rental_listings_stats: list[dict]
-    demographic_stats: list[dict]
\ No newline at end of file
+def merge_sections(left, right):
+    return {**left, **right}
+
+
+# The report subgraph reads the run state, collects the drafted and polished section groups by name and
+# writes the draft and final reports.
+class ReportState(State):
+    draft_sections: Annotated[dict[str, str], merge_sections]
+    final_sections: Annotated[dict[str, str], merge_sections]
+
+
+class ReportOutput(TypedDict):
+    draft_report: str
+    final_report: str
+
+
+# Sent to each section writer by the fan-out: the run state plus the name of its section group.
+class SectionState(State):
+    draft_group: str
+
+
+# Sent to each section polisher by its section writer: the name of the group and its drafted sections.
+class PolishState(TypedDict):
+    draft_group: str
+    draft: str
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.cache import response_cache
+from src.sketch import DDSketch
+from src.analytics import listing_metrics, float_values
+from config import STATS_STORE_PATH, SKETCH_RELATIVE_ACCURACY
+
+
+logger = logging.getLogger(__name__)
+
+
+def _fingerprints(ids, listings, metrics):
+    """Returns int64 hashes of the listing ids and of each listing's metric values, one per unique id (last wins)."""
+    id_hashes = pd.util.hash_array(pd.Series(ids, dtype=object).astype(str).to_numpy()).view(np.int64)
+    values = pd.DataFrame({label: float_values(listings, column) for column, label in metrics})
+    digests = pd.util.hash_pandas_object(values, index=False).to_numpy().view(np.int64)
+    unique = ~pd.Series(id_hashes).duplicated(keep="last").to_numpy()
+    return id_hashes[unique], digests[unique], values[unique].reset_index(drop=True)
+
+
+class StatsStore:
+    """
+    Incrementally maintained listing statistics per submarket, backed by SQLite.
+
+    Each submarket keeps a snapshot of (listing id hash, value hash) pairs, the metric values of every listing,
+    and per-metric count, running sum and a DDSketch of the values. A refresh diffs the fetched listings
+    against the snapshot in memory and only touches the stored values and aggregates of added, removed and
+    changed listings: means stay exact, min and max are read from an index on the stored values, and
+    medians come from the sketch within `relative_accuracy`. The store follows the response cache mode and
+    is only used when it is writable.
+    """
+
+    def __init__(self, path, relative_accuracy):
+        self.path = path
+        self.relative_accuracy = relative_accuracy
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    submarket TEXT PRIMARY KEY,
+                    ids BLOB NOT NULL,
+                    digests BLOB NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS listing_values (
+                    submarket TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    metric TEXT NOT NULL,
+                    value REAL NOT NULL,
+                    PRIMARY KEY (submarket, id, metric)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS listing_values_value ON listing_values (submarket, metric, value)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS aggregates (
+                    submarket TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    total REAL NOT NULL,
+                    sketch TEXT NOT NULL,
+                    PRIMARY KEY (submarket, metric)
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _aggregate(self, conn, submarket, metric):
+        """Loads a metric's aggregate, rebuilding it from the stored values when missing or built with another accuracy."""
+        row = conn.execute(
+            "SELECT count, total, sketch FROM aggregates WHERE submarket = ? AND metric = ?",
+            (submarket, metric)
+        ).fetchone()
+        if row is not None:
+            sketch = DDSketch.from_dict(json.loads(row[2]))
+            if sketch.relative_accuracy == self.relative_accuracy:
+                return {"count": row[0], "total": row[1], "sketch": sketch}
+        values = np.array([value for value, in conn.execute(
+            "SELECT value FROM listing_values WHERE submarket = ? AND metric = ?",
+            (submarket, metric)
+        )], dtype=np.float64)
+        sketch = DDSketch(self.relative_accuracy)
+        sketch.update(values)
+        return {"count": len(values), "total": float(values.sum()), "sketch": sketch}
+
+    def _stored_values(self, conn, submarket, ids):
+        """Returns the stored (metric, value) rows of the given listing id hashes."""
+        rows = []
+        ids = ids.tolist()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows += conn.execute(
+                f"SELECT metric, value FROM listing_values WHERE submarket = ? AND id IN ({', '.join('?' * len(chunk))})",
+                (submarket, *chunk)
+            ).fetchall()
+        return pd.DataFrame(rows, columns=["metric", "value"])
+
+    def refresh(self, submarket, ids, listings, spec):
+        """
+        Applies a fresh fetch of a submarket's listings and returns its one-row stats table,
+        or None when the response cache is not writable.
+        """
+        if not response_cache.writable:
+            return None
+        metrics = listing_metrics(spec)
+        id_hashes, digests, values = _fingerprints(ids, listings, metrics)
+        with self._lock:
+            conn = self._connect()
+            snapshot = conn.execute("SELECT ids, digests FROM snapshots WHERE submarket = ?", (submarket,)).fetchone()
+            old_ids = np.frombuffer(snapshot[0], dtype=np.int64) if snapshot else np.empty(0, dtype=np.int64)
+            old_digests = np.frombuffer(snapshot[1], dtype=np.int64) if snapshot else np.empty(0, dtype=np.int64)
+            positions = pd.Index(old_ids).get_indexer(id_hashes)
+            known = positions != -1
+            changed = np.zeros(len(id_hashes), dtype=bool)
+            changed[known] = old_digests[positions[known]] != digests[known]
+            fresh = ~known | changed
+            removed_ids = old_ids[~np.isin(old_ids, id_hashes)]
+            stale_ids = np.concatenate([removed_ids, id_hashes[changed]])
+            stale = self._stored_values(conn, submarket, stale_ids)
+            added = values[fresh].assign(id=id_hashes[fresh]).melt(id_vars="id", var_name="metric").dropna(subset=["value"])
+            stats = {}
+            for _, label in metrics:
+                aggregate = self._aggregate(conn, submarket, label)
+                removed_values = stale.loc[stale["metric"] == label, "value"].to_numpy(dtype=np.float64)
+                added_values = added.loc[added["metric"] == label, "value"].to_numpy(dtype=np.float64)
+                aggregate["sketch"].update(removed_values, -1)
+                aggregate["sketch"].update(added_values)
+                aggregate["count"] += len(added_values) - len(removed_values)
+                aggregate["total"] += float(added_values.sum() - removed_values.sum())
+                conn.execute(
+                    "INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?, ?)",
+                    (submarket, label, aggregate["count"], aggregate["total"], json.dumps(aggregate["sketch"].to_dict()))
+                )
+                stats[label] = aggregate
+            conn.executemany(
+                "DELETE FROM listing_values WHERE submarket = ? AND id = ?",
+                [(submarket, id) for id in stale_ids.tolist()]
+            )
+            conn.executemany(
+                "INSERT INTO listing_values VALUES (?, ?, ?, ?)",
+                [(submarket, id, metric, value) for id, metric, value in zip(added["id"].tolist(), added["metric"], added["value"].tolist())]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                (submarket, id_hashes.tobytes(), digests.tobytes(), time.time())
+            )
+            for label, aggregate in stats.items():
+                aggregate["min"], aggregate["max"] = conn.execute(
+                    "SELECT MIN(value), MAX(value) FROM listing_values WHERE submarket = ? AND metric = ?",
+                    (submarket, label)
+                ).fetchone()
+            conn.commit()
+        logger.info(f"[StatsStore] Applied {int((~known).sum())} added, {int(changed.sum())} changed and {len(removed_ids)} removed listings.")
+        row = {}
+        for _, label in metrics:
+            aggregate = stats[label]
+            count = aggregate["count"]
+            row[f"average{label}"] = aggregate["total"] / count if count else np.nan
+            row[f"median{label}"] = aggregate["sketch"].median()
+            row[f"min{label}"] = np.nan if aggregate["min"] is None else aggregate["min"]
+            row[f"max{label}"] = np.nan if aggregate["max"] is None else aggregate["max"]
+        row["totalListings"] = len(listings)
+        return pd.DataFrame([row])
+
+
+stats_store = StatsStore(STATS_STORE_PATH, SKETCH_RELATIVE_ACCURACY)
@@ -0,0 +1,136 @@
+import os
+import logging
+import argparse
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+
+from src.cache import response_cache, CACHE_MODES
+from src.clients import request_json, paginate_json, close_client
+from src.columnar import ColumnBuffer, SALE_LISTING_SCHEMA, RENTAL_LISTING_SCHEMA
+from src.spatial import haversine
+from src.analytics import (
+    LISTING_SPECS,
+    COMP_RANK_FIELDS,
+    listing_metrics,
+    float_values,
+    prefix_summaries,
+    prepare_listings,
+    comps_mask,
+    rank_comps
+)
+from config import (
+    RENTCAST_API_KEY,
+    RENTCAST_URL,
+    OUTPUT_DIR,
+    CACHE_MODE,
+    PROPERTY_TYPES,
+    SWEEP_RADII
+)
+
+
+logger = logging.getLogger(__name__)
+
+ALL_PROPERTY_TYPES = "All"
+
+LISTING_ENDPOINTS = {
+    "sale": ("listings/sale", SALE_LISTING_SCHEMA),
+    "rental": ("listings/rental/long-term", RENTAL_LISTING_SCHEMA)
+}
+
+
+def fetch(address, radius):
+    """Fetches the subject property and its sale and rental listings of every property type within `radius` miles."""
+    headers = {"X-Api-Key": RENTCAST_API_KEY or ""}
+    subject_property = request_json("GET", f"{RENTCAST_URL}/properties/{address.replace(' ', '-')}", cache_namespace="rentcast/properties", headers=headers)
+    buffers = {}
+    for kind, (endpoint, schema) in LISTING_ENDPOINTS.items():
+        buffers[kind] = ColumnBuffer(schema)
+        paginate_json(
+            f"{RENTCAST_URL}/{endpoint}",
+            {"address": address, "radius": radius},
+            sink=buffers[kind].append_page,
+            cache_namespace=f"rentcast/{endpoint}",
+            headers=headers
+        )
+        logger.info(f"[fetch] Fetched {len(buffers[kind])} {kind} listings within {radius} miles.")
+    return subject_property, buffers
+
+
+def sweep(subject_property, buffers, radii, property_types):
+    """
+    Computes listing stats and top comps for every (kind, property type, radius) cell from one fetch.
+
+    Each kind's listings are sorted once by haversine distance to the subject, so the listings of a cell
+    are a prefix of its property type's rows, ending where the radius falls in the sorted distances.
+    Stats of all radii come from one cumulative pass per metric. Returns the stats cube indexed by
+    (kind, propertyType, radius) and the top comps of every cell in one long table.
+    """
+    radii = sorted(radii)
+    subject = pd.to_numeric(pd.Series(subject_property).reindex(COMP_RANK_FIELDS), errors="coerce")
+    stats, top_comps = [], []
+    for kind, buffer in buffers.items():
+        spec = LISTING_SPECS[kind]
+        frame = buffer.to_frame()
+        distances = haversine(
+            subject_property.get("latitude", np.nan),
+            subject_property.get("longitude", np.nan),
+            float_values(frame, "latitude"),
+            float_values(frame, "longitude")
+        )
+        order = np.argsort(distances, kind="stable")
+        distances = distances[order]
+        types = frame["propertyType"].to_numpy()[order]
+        listings = prepare_listings(frame.iloc[order].reset_index(drop=True), spec)
+        for property_type in [ALL_PROPERTY_TYPES, *property_types]:
+            rows = np.arange(len(listings)) if property_type == ALL_PROPERTY_TYPES else np.flatnonzero(types == property_type)
+            cell_listings = listings.iloc[rows].reset_index(drop=True)
+            ends = np.searchsorted(distances[rows], radii, side="right")
+            summaries = [
+                (label, prefix_summaries(float_values(cell_listings, column), ends))
+                for column, label in listing_metrics(spec)
+            ]
+            for i, (radius, end) in enumerate(zip(radii, ends)):
+                row = {"kind": kind, "propertyType": property_type, "radius": radius}
+                for label, summary in summaries:
+                    row[f"average{label}"] = summary[i]["average"]
+                    row[f"median{label}"] = summary[i]["median"]
+                    row[f"min{label}"] = summary[i]["min"]
+                    row[f"max{label}"] = summary[i]["max"]
+                row["totalListings"] = int(end)
+                stats.append(row)
+                prefix = cell_listings.iloc[:end]
+                comps = prefix.loc[comps_mask(prefix, subject)].reset_index(drop=True)
+                ranked = rank_comps(comps, subject)
+                ranked.insert(0, "radius", radius)
+                ranked.insert(0, "propertyType", property_type)
+                ranked.insert(0, "kind", kind)
+                top_comps.append(ranked)
+    return pd.DataFrame(stats).set_index(["kind", "propertyType", "radius"]), pd.concat(top_comps, ignore_index=True)
+
+
+def run(address, radii, property_types):
+    """Fetches once at the largest radius and returns the stats cube and top comps of every cell."""
+    try:
+        subject_property, buffers = fetch(address, max(radii))
+    finally:
+        close_client()
+    return sweep(subject_property, buffers, radii, property_types)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    parser = argparse.ArgumentParser(description="Compute listing stats and comps for several radii and property types from one fetch.")
+    parser.add_argument("address")
+    parser.add_argument("--radii", type=float, nargs="+", default=SWEEP_RADII, help="Radii in miles.")
+    parser.add_argument("--property-types", nargs="+", default=PROPERTY_TYPES)
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default=CACHE_MODE)
+    args = parser.parse_args()
+    response_cache.set_mode(args.cache_mode)
+    stats, top_comps = run(args.address, args.radii, args.property_types)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_path = f"{OUTPUT_DIR}/sweep_{uuid4().hex[:8]}"
+    stats.to_csv(f"{output_path}_stats.csv")
+    top_comps.to_csv(f"{output_path}_top_comps.csv", index=False)
+    logger.info(f"Saved {len(stats)} stats cells to {output_path}_stats.csv and their top comps to {output_path}_top_comps.csv.")
@@ -1,30 +1,284 @@
 import os
 os.environ["MPLBACKEND"] = "Agg"
-from typing import Annotated
+import re
+import ast
+import json
+import hashlib
+import logging
+import warnings
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+import numpy as np
+import pandas as pd
 
 from langchain_core.tools import tool
-from langgraph.prebuilt import InjectedState
+from langchain_core.runnables import RunnableConfig
 import pandasai as pai
+from pandasai import Agent
+from pandasai.config import Config
 from pandasai_litellm.litellm import LiteLLM
 from pandasai.core.response.chart import ChartResponse
+from pandasai.core.response.error import ErrorResponse
+
+from src.ratelimit import get_limiter
+from src.cache import response_cache, make_key
+from src.chart_store import chart_key, analyzer_chart_store
+from config import PANDASAI_MODEL, ANALYZER_WORKERS, SQL_MAX_ROWS, CACHE_TTL
+
+
+logger = logging.getLogger(__name__)
+
+
+ANALYZER_BACKENDS = ("pandasai", "duckdb", "hybrid")
+
+# Tables of a report run that the analyzer can query, in the order they are handed to PandasAI.
+ANALYZER_TABLES = [
+   "subject_property",
+   "sale_listings",
+   "sale_comps",
+   "sale_top_comps",
+   "sale_listings_stats",
+   "rental_listings",
+   "rental_comps",
+   "rental_top_comps",
+   "rental_listings_stats",
+   "demographic_stats",
+   "derived_metrics",
+   "bedroom_segments"
+]
+
+# One-row tables shown to the LLM in full by the prompt's `df.head()`; generated code that hard-codes their
+# values only holds for this property, so it is not kept for other runs.
+ANALYZER_SINGLE_ROW_TABLES = [
+   "subject_property",
+   "sale_listings_stats",
+   "rental_listings_stats",
+   "demographic_stats",
+   "derived_metrics"
+]
+
+# Number and string literals inside the SQL of generated code.
+SQL_NUMBER_PATTERN = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+SQL_STRING_PATTERN = re.compile(r"'([^']*)'")
+
+# Generated code that draws through matplotlib's pyplot state machine, directly or via pandas or seaborn.
+PYPLOT_PATTERN = re.compile(r"\b(?:matplotlib|plt|seaborn|sns)\b|\.plot\b")
+
+# pyplot's current figure is shared by every thread of the process, so chart code runs one at a time.
+_pyplot_lock = threading.Lock()
+
+# Chart file names in generated code, matched like PandasAI's code cleaner does.
+CHART_PATH_PATTERN = re.compile(r"""(['"])([^'"]*\.png)\1""")
+
+
+class RateLimitedLiteLLM(LiteLLM):
+   """LiteLLM client that takes a slot from the shared PandasAI rate limiter before every completion."""
+
+   def call(self, instruction, context=None):
+      get_limiter("pandasai").acquire()
+      return super().call(instruction, context)
+
+
+class PyplotLockedAgent(Agent):
+   """PandasAI agent that runs generated code using pyplot under a process-wide lock; other code runs freely."""
+
+   def execute_code(self, code):
+      if not PYPLOT_PATTERN.search(code):
+         return super().execute_code(code)
+      with _pyplot_lock:
+         return super().execute_code(code)
+
+
+def _schema_signature(tables):
+   """Returns a hash of the tables' names, columns and dtypes."""
+   layout = [[name, [str(column) for column in tables[name]], [str(dtype) for dtype in tables[name].dtypes]] for name in sorted(tables)]
+   return hashlib.sha256(json.dumps(layout).encode()).hexdigest()
+
+
+def _fingerprint(tables):
+   """Returns a content hash of the tables' schema and values; object cells are hashed by their string form."""
+   digest = hashlib.sha256(_schema_signature(tables).encode())
+   for name in sorted(tables):
+      frame = tables[name]
+      objects = {column: frame[column].astype(str) for column in frame.select_dtypes("object")}
+      digest.update(pd.util.hash_pandas_object(frame.assign(**objects), index=False).to_numpy().tobytes())
+   return digest.hexdigest()
+
+
+def _code_literals(code):
+   """
+   Returns the numeric and string constants of Python code, numbers rounded to cents. String constants
+   are also scanned for the numbers and quoted strings of the SQL that PandasAI code passes to DuckDB.
+   """
+   literals = set()
+   for node in ast.walk(ast.parse(code)):
+      if isinstance(node, ast.Constant) and not isinstance(node.value, bool):
+         if isinstance(node.value, (int, float)):
+            literals.add(round(float(node.value), 2))
+         elif isinstance(node.value, str):
+            literals.add(node.value.strip().lower())
+            literals.update(round(float(number), 2) for number in SQL_NUMBER_PATTERN.findall(node.value))
+            literals.update(string.strip().lower() for string in SQL_STRING_PATTERN.findall(node.value))
+   return literals
+
+
+def _row_literals(tables):
+   """
+   Returns the distinctive values of the one-row tables as they would appear as constants in code.
+
+   Numbers below 10 and strings shorter than 3 characters are left out: they are as likely to be a
+   `round(x, 2)` or a state code as a hard-coded value.
+   """
+   literals = set()
+   for name in ANALYZER_SINGLE_ROW_TABLES:
+      if name not in tables:
+         continue
+      for value in tables[name].head(1).to_numpy().ravel():
+         if isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_)):
+            if np.isfinite(value) and abs(value) >= 10:
+               literals.add(round(float(value), 2))
+         elif isinstance(value, str) and len(value.strip()) >= 3:
+            literals.add(value.strip().lower())
+   return literals
+
+
+class AnalyzerSession:
+   """
+   PandasAI context of one report run: the LLM client, its config and the wrapped tables are built once
+   and reused by every `data_analyzer` call of the run.
+
+   The config is passed to each agent instead of being set on the global `pai.config`, so concurrent runs
+   in one process never see each other's tables or client. Every query gets a fresh lightweight `Agent`,
+   which keeps parallel tool calls of a run from sharing conversation state.
+
+   Answers are memoized in the response cache under the "analyzer" namespace, keyed by the normalized
+   query and a content hash of the tables, so retried drafts and reruns over the same data replay them.
+   The code behind each answer is also kept under "analyzer/code", keyed by the query and the tables'
+   schema only: other properties' runs execute it against their own tables and only ask the LLM for
+   new code when it fails. Code that hard-codes values of the one-row tables the LLM sees in full is not
+   kept, since it would answer for this property. Charts are moved into the analyzer chart store, keyed
+   by their code and the tables' content, so rerunning cached chart code over the same data reuses the
+   rendered file.
 
-from config import PANDASAI_MODEL
+   SQL queries run on an in-memory DuckDB connection that scans the same DataFrames in place; it is opened
+   on first use, has no file system access and serves one query at a time.
+   """
+
+   def __init__(self, tables):
+      self.tables = {name: tables[name] for name in ANALYZER_TABLES if name in tables}
+      self.config = Config(llm=RateLimitedLiteLLM(model=PANDASAI_MODEL))
+      self.dfs = [pai.DataFrame(frame, _table_name=name) for name, frame in self.tables.items()]
+      self.schema = _schema_signature(self.tables)
+      self.fingerprint = _fingerprint(self.tables)
+      self.row_literals = _row_literals(self.tables)
+      self._sql_conn = None
+      self._sql_lock = threading.Lock()
+
+   def _agent(self):
+      with warnings.catch_warnings():
+         # Agent-level config is flagged as deprecated in favor of the global config, which is not run-safe.
+         warnings.simplefilter("ignore", DeprecationWarning)
+         return PyplotLockedAgent(self.dfs, config=self.config)
+
+   def chat(self, query):
+      """Answers a query with cached code for the same query and schema when it runs, else with PandasAI."""
+      agent = self._agent()
+      key = make_key("analyzer/code", PANDASAI_MODEL, query, self.schema)
+      cached = response_cache.get("analyzer/code", key)
+      if cached is not None:
+         try:
+            # Cleaning again validates the code against this agent and gives a chart a fresh file name.
+            code = agent._code_generator.validate_and_clean_code(cached["code"])
+            if cached.get("type") == "chart":
+               path = analyzer_chart_store.get(analyzer_chart_store.path(self._chart_key(code)))
+               if path:
+                  logger.info(f"[AnalyzerSession] Answered with a stored chart of cached code.")
+                  return ChartResponse(path, code)
+            response = agent._response_parser.parse(agent.execute_code(code), code)
+            logger.info(f"[AnalyzerSession] Answered with cached {response.type} code.")
+            return self._store_chart(response)
+         except Exception as e:
+            logger.info(f"[AnalyzerSession] Cached code failed, generating new code: {e}")
+
+      response = agent.chat(query)
+
+      if not isinstance(response, ErrorResponse) and not self._hard_codes_rows(response.last_code_executed):
+         response_cache.set(
+            "analyzer/code",
+            key,
+            {"code": response.last_code_executed, "type": response.type},
+            CACHE_TTL["analyzer/code"]
+         )
+      return self._store_chart(response)
+
+   def _hard_codes_rows(self, code):
+      """Returns whether code contains a value of this run's one-row tables as a literal."""
+      try:
+         hard_coded = _code_literals(code) & self.row_literals
+      except SyntaxError:
+         return True
+      if hard_coded:
+         logger.info(f"[AnalyzerSession] Not caching code with hard-coded values: {sorted(map(str, hard_coded))}")
+      return bool(hard_coded)
+
+   def _chart_key(self, code):
+      return chart_key({"code": CHART_PATH_PATTERN.sub(r"\1chart.png\1", code), "tables": self.fingerprint})
+
+   def _store_chart(self, response):
+      """Moves the file of a chart response into the analyzer chart store."""
+      if not isinstance(response, ChartResponse):
+         return response
+      path = analyzer_chart_store.path(self._chart_key(response.last_code_executed))
+      return ChartResponse(analyzer_chart_store.put(path, response.value), response.last_code_executed)
+
+   def answer(self, query):
+      """Returns the string answer to a query; charts are answered with their stored path."""
+      key = make_key("analyzer", PANDASAI_MODEL, query, self.fingerprint)
+      cached = response_cache.get("analyzer", key)
+      # A cached chart is only replayed while its file still exists.
+      if cached is not None and (cached["type"] != "chart" or os.path.exists(cached["value"])):
+         logger.info(f"[AnalyzerSession] Replayed cached {cached['type']} answer.")
+         return cached["value"]
+
+      response = self.chat(query)
+
+      value = str(response.value)
+      if not isinstance(response, ErrorResponse):
+         response_cache.set("analyzer", key, {"type": response.type, "value": value}, CACHE_TTL["analyzer"])
+      return value
+
+   def answer_many(self, queries):
+      """
+      Answers independent queries concurrently on up to `ANALYZER_WORKERS` threads, in the given order.
+      Generated chart code still runs one query at a time, see `PyplotLockedAgent`.
+      """
+      def answer(query):
+         try:
+            return self.answer(query)
+         except Exception as e:
+            return json.dumps({"error": str(e)})
+
+      with ThreadPoolExecutor(max_workers=max(1, min(ANALYZER_WORKERS, len(queries)))) as pool:
+         return list(pool.map(answer, queries))
+
+   def sql(self, query):
+      """Runs a DuckDB SQL query over the tables and returns the result as a DataFrame."""
+      with self._sql_lock:
+         if self._sql_conn is None:
+            conn = duckdb.connect()
+            for name, frame in self.tables.items():
+               conn.register(name, frame)
+            conn.execute("SET enable_external_access = false")
+            self._sql_conn = conn
+         return self._sql_conn.execute(query).df()
 
 
 @tool
-def data_analyzer(
-      query: str, 
-      subject_property: Annotated[list[dict], InjectedState("subject_property")],
-      sale_listings: Annotated[list[dict], InjectedState("sale_listings")],
-      sale_comps: Annotated[list[dict], InjectedState("sale_comps")],
-      sale_listings_stats: Annotated[list[dict], InjectedState("sale_listings_stats")],
-      rental_listings: Annotated[list[dict], InjectedState("rental_listings")],
-      rental_comps: Annotated[list[dict], InjectedState("rental_comps")],
-      rental_listings_stats: Annotated[list[dict], InjectedState("rental_listings_stats")],
-      demographic_stats: Annotated[list[dict], InjectedState("demographic_stats")],
-   ) -> str:
-   """
-   Performs data analysis tasks based on a natural-language query over injected in-memory DataFrames using PandasAI.
+def data_analyzer(query: str, config: RunnableConfig) -> str:
+   """
+   Performs data analysis tasks based on a natural-language query over the report's in-memory DataFrames using PandasAI.
 
    Args:
       query (str): Natural-language query.
@@ -37,27 +291,55 @@ def data_analyzer(
          - Chart Response: Saved path of the chart image
          - Error Response: JSON-formatted error message
    """
-   llm = LiteLLM(model=PANDASAI_MODEL)
-   pai.config.set({
-      "llm": llm
-   })
-
-   dfs = [
-      pai.DataFrame(subject_property, _table_name="subject_property"),
-      pai.DataFrame(sale_listings, _table_name="sale_listings"),
-      pai.DataFrame(sale_comps, _table_name="sale_comps"),
-      pai.DataFrame(sale_listings_stats, _table_name="sale_listings_stats"),
-      pai.DataFrame(rental_listings, _table_name="rental_listings"),
-      pai.DataFrame(rental_comps, _table_name="rental_comps"),
-      pai.DataFrame(rental_listings_stats, _table_name="rental_listings_stats"),
-      pai.DataFrame(demographic_stats, _table_name="demographic_stats")
-   ]
-
-   response = pai.chat(query, *dfs)
-
-   if isinstance(response, ChartResponse):
-      file_path = response.value
-      response.save(file_path)
-      return file_path
-   else:
-      return str(response.value)
\ No newline at end of file
+   session = config["configurable"]["analyzer_session"]
+   return session.answer(query)
+
+
+@tool
+def batch_data_analyzer(queries: list[str], config: RunnableConfig) -> str:
+   """
+   Performs several independent data analysis tasks at once, each based on a natural-language query, using PandasAI.
+
+   Args:
+      queries (list[str]): Natural-language queries that do not depend on each other's results.
+
+   Returns:
+      responses (str): JSON list of {"query", "response"} objects in the order of the queries; each response is one of the `data_analyzer` response types.
+   """
+   session = config["configurable"]["analyzer_session"]
+   responses = session.answer_many(queries)
+   return json.dumps([{"query": query, "response": response} for query, response in zip(queries, responses)], indent=2)
+
+
+@tool
+def sql_analyzer(query: str, config: RunnableConfig) -> str:
+   """
+   Runs a DuckDB SQL query over the report's in-memory tables for lookups, filters, aggregations and group-bys.
+
+   Args:
+      query (str): DuckDB SQL query over the tables and columns of the documented schemas.
+
+   Returns:
+      response (str): Result table as CSV, or a JSON-formatted error message.
+   """
+   session = config["configurable"]["analyzer_session"]
+   try:
+      df = session.sql(query)
+   except duckdb.Error as e:
+      return json.dumps({"error": str(e)})
+   response = df.head(SQL_MAX_ROWS).to_csv(index=False)
+   if len(df) > SQL_MAX_ROWS:
+      response += f"\n({len(df) - SQL_MAX_ROWS} more rows not shown out of {len(df)}; aggregate or add a LIMIT to narrow the result.)\n"
+   return response
+
+
+def get_analyzer_tools(backend):
+   """Returns the draft agent's tools for an analyzer backend: PandasAI, DuckDB SQL, or both."""
+   if backend not in ANALYZER_BACKENDS:
+      raise ValueError(f"Invalid analyzer backend: {backend}. Expected one of {ANALYZER_BACKENDS}.")
+   tools = []
+   if backend in ("duckdb", "hybrid"):
+      tools.append(sql_analyzer)
+   if backend in ("pandasai", "hybrid"):
+      tools += [data_analyzer, batch_data_analyzer]
+   return tools
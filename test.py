@@ -1,13 +1,42 @@
+import argparse
+import asyncio
 import json
+import logging
 
 from src.graph import build_graph
 from src.state import State
-from config import DATA_DIR
+from src.clients import aclose_client
+from src.cache import response_cache, CACHE_MODES
+from src.arcgis import enrich_many
+from src.ratelimit import quota_usage
+from src.nodes import DEMOGRAPHIC_VARIABLES
+from config import DATA_DIR, CACHE_MODE
 
-workflow = build_graph()
+logger = logging.getLogger(__name__)
 
-with open(f"{DATA_DIR}/test_cases.json", "r") as f:
-    test_cases = json.load(f)
 
-for test_case in test_cases:
-    workflow.invoke(State(address=test_case["address"], property_type=test_case["property_type"]))
\ No newline at end of file
+async def main():
+    workflow = build_graph()
+
+    with open(f"{DATA_DIR}/test_cases.json", "r") as f:
+        test_cases = json.load(f)
+
+    # Warm the demographics cache for every run with batched multi-area requests.
+    if response_cache.writable:
+        await asyncio.to_thread(enrich_many, [test_case["address"] for test_case in test_cases], DEMOGRAPHIC_VARIABLES)
+
+    try:
+        for test_case in test_cases:
+            await workflow.ainvoke(State(address=test_case["address"], property_type=test_case["property_type"]))
+    finally:
+        await aclose_client()
+        logger.info(f"Response cache stats: {response_cache.stats()}")
+        logger.info(f"API quota usage: {quota_usage()}")
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--cache-mode", choices=CACHE_MODES, default=CACHE_MODE)
+args = parser.parse_args()
+response_cache.set_mode(args.cache_mode)
+
+asyncio.run(main())